@@ -2,10 +2,17 @@
 Common action parsing utilities for agent interactions.
 """
 import re
+from functools import lru_cache
 from typing import Optional, Any
 from abc import ABC, abstractmethod
 
 
+@lru_cache(maxsize=64)
+def _tag_pattern(tag: str) -> re.Pattern[str]:
+    """Compiled pattern for the content of an XML-style tag, shared by all parsers."""
+    return re.compile(f"<{tag}>(.*?)</{tag}>", re.DOTALL)
+
+
 class ActionParser(ABC):
     """Base class for parsing LLM responses into structured actions."""
     
@@ -17,10 +24,18 @@ class ActionParser(ABC):
     @staticmethod
     def extract_tag_content(response: str, tag: str) -> Optional[str]:
         """Extract content between XML-style tags."""
-        pattern = f"<{tag}>(.*?)</{tag}>"
-        match = re.search(pattern, response, re.DOTALL)
+        match = _tag_pattern(tag).search(response)
         return match.group(1) if match else None
     
+    @staticmethod
+    def close_stopped_tag(response: str, tags: tuple[str, ...]) -> str:
+        """Re-append the closing tag swallowed by a stop sequence on the last opened tag."""
+        tag = max(tags, key=lambda t: response.rfind(f"<{t}>"))
+        start = response.rfind(f"<{tag}>")
+        if start != -1 and f"</{tag}>" not in response[start:]:
+            return response + f"</{tag}>"
+        return response
+    
     @staticmethod
     def clean_response(response: str) -> str:
         """Remove reasoning tags from response if present."""
@@ -2,6 +2,9 @@
 Log parser generation agent for improving test output parsing accuracy.
 """
 import json
+import logging
+import re
+from collections import deque
 from typing import Any, Literal
 
 from langchain.schema import HumanMessage, SystemMessage
@@ -10,10 +13,12 @@ from pydantic import BaseModel, Field
 from launch.agent.action_parser import ActionParser
 from launch.agent.prompt import ReAct_prompt
 from launch.agent.state import AgentState, auto_catch
-from launch.scripts.parser import run_parser
-from launch.utilities.llm import form_llm_cost_log, update_accumulative_cost
+from launch.scripts.parser import PARSER_TIMEOUT, digest, run_parser_cached
+from launch.utilities.llm import PROMPT_CACHE_CONTROL, form_llm_cost_log, update_accumulative_cost
 
-system_msg: str = """You are a developer specializing in test output analysis and parsing. Your task is to examine the test output, evaluate the current parser, and generate an improved, fully robust parser.
+def _build_system_msg(test_output: str, current_parser: str, current_results: str, steps: int) -> str:
+    """Render the parse log system prompt with direct f-string interpolation."""
+    return f"""You are a developer specializing in test output analysis and parsing. Your task is to examine the test output, evaluate the current parser, and generate an improved, fully robust parser.
 
 You have access to:
 - **Raw test output** from the previous stage: {test_output}
@@ -86,6 +91,9 @@ class ParseLogAction(BaseModel):
     args: Any = Field(None, description="The action arguments")
 
 
+_ACTION_DOC: str = ParseLogAction.__doc__
+
+
 class ParseLogObservation(BaseModel):
     """Observation for the parse log action"""
 
@@ -93,6 +101,13 @@ class ParseLogObservation(BaseModel):
     is_stop: bool = Field(False, description="Whether stop the parse log loop")
 
 
+# Tag patterns in priority order, compiled once at import
+_TAG_RES: dict[str, re.Pattern] = {
+    name: re.compile(rf"<{name}>(.*?)</{name}>", re.DOTALL)
+    for name in ("submit", "python", "analyze")
+}
+
+
 class ParseLogActionParser(ActionParser):
     """Parser for parse log agent actions."""
     
@@ -100,28 +115,38 @@ class ParseLogActionParser(ActionParser):
         """Parse action from LLM response text."""
         response = self.clean_response(response)
         
-        submit = self.extract_tag_content(response, "submit")
-        if submit:
-            return ParseLogAction(action="submit", args=submit)
-
-        script = self.extract_tag_content(response, "python")
-        if script:
-            return ParseLogAction(action="python", args=script)
-
-        analyze = self.extract_tag_content(response, "analyze")
-        if analyze:
-            return ParseLogAction(action="analyze", args=analyze)
+        for name, pattern in _TAG_RES.items():
+            # cheap substring check first, most responses carry a single tag
+            if f"<{name}>" not in response:
+                continue
+            match = pattern.search(response)
+            if match and match.group(1):
+                return ParseLogAction(action=name, args=match.group(1))
             
         return None
 
 
+_parselog_action_parser = ParseLogActionParser()
+
+
 def parse_parselog_action(response: str) -> ParseLogAction | None:
     """Parse parse log action from LLM response text."""
-    parser = ParseLogActionParser()
-    return parser.parse(response)
+    return _parselog_action_parser.parse(response)
 
 
 PARSELOG_CONVERSATION_WINDOW = 30
+# Stop early once this many consecutive observations are identical for the same parser
+PARSELOG_STALL_LIMIT = 3
+
+def _dump_results(results: dict, limit: int, suffix: str) -> str:
+    """
+    Pretty-print parser results if their compact form fits in limit characters,
+    otherwise truncate the compact form, which packs far more test cases per character.
+    """
+    compact = json.dumps(results, separators=(",", ":"))
+    if len(compact) > limit:
+        return compact[:limit] + suffix
+    return json.dumps(results, indent=2)
 
 
 @auto_catch
@@ -141,14 +166,20 @@ def generate_log_parser(state: AgentState, max_steps: int = 20) -> dict:
     framework_detected: str = ""
     analysis_result: str = ""
     improved_test_status: dict[str, Literal['pass', 'fail', 'skip']] = {}
+    # the parser script that actually produced improved_test_status
+    status_parser: str = ""
+    # memo of the last parser script run against test_output and its result
+    last_tested_parser: str | None = None
+    last_result: Any = None
     def observation_for_parselog_action(
         state: AgentState, action: ParseLogAction | None
     ) -> ParseLogObservation:
         """Execute parse log action and return observation."""
         nonlocal improved_parser, framework_detected, analysis_result, improved_test_status
+        nonlocal last_tested_parser, last_result, status_parser
 
         if not action or not action.action:
-            content = f"""Please use the following format to make a valid action choice:\n{ParseLogAction.__doc__}"""
+            content = f"""Please use the following format to make a valid action choice:\n{_ACTION_DOC}"""
             return ParseLogObservation(content=content, is_stop=False)
             
         if action.action == "analyze":
@@ -171,17 +202,20 @@ def generate_log_parser(state: AgentState, max_steps: int = 20) -> dict:
                 
             # Test the improved parser
             try:
-                result = run_parser(improved_parser, test_output)
+                if improved_parser == last_tested_parser:
+                    result = last_result
+                else:
+                    result = run_parser_cached(improved_parser, test_output, test_output_digest)
+                    last_tested_parser, last_result = improved_parser, result
                 if not isinstance(result, dict):
                     content = f"Your python parser script should return a dict[str, Literal['pass', 'fail', 'skip']]. However, your script returned type {type(result)}. Please adjust your parser script to make sure it returns the correct format."
                     return ParseLogObservation(content=content, is_stop=False)
                 improved_test_status = result
-                truncated_result = json.dumps(result, indent=2)
-                if len(truncated_result) > 10000:
-                    truncated_result = truncated_result[:10000] + "\n...result truncated due to length..."
+                status_parser = improved_parser
+                truncated_result = _dump_results(result, 10000, "\n...result truncated due to length...")
                 
                 # Compare with original results if available
-                original_results = state.get("test_status", {})
+                original_results = current_results
                 if original_results:
                     new_count = len(result)
                     old_count = len(original_results)
@@ -200,6 +234,8 @@ Please analyze if this is an improvement and submit if satisfied."""
 
 Parser executed successfully. Please analyze the results and submit if satisfied."""
                     
+            except TimeoutError:
+                content = f"Your parser did not finish within {PARSER_TIMEOUT} seconds, likely due to catastrophic regex backtracking or an infinite loop. Please simplify the patterns and try again."
             except Exception as e:
                 content = f"Error testing parser: {str(e)}\nPlease fix the parser and try again."
                 
@@ -229,74 +265,79 @@ Parser executed successfully. Please analyze the results and submit if satisfied
     
     # Get data from previous testall stage
     test_output = ""
-    current_parser = ""
-    current_results = {}
+    current_parser = state.get("parser", "")
+    current_results = state.get("test_status", {})
     
     # Rerun test commands and print commands to get fresh test output
     test_commands = state.get("test_commands", [])
     print_commands = state.get("print_commands", [])
 
+    # One send_command per command: joining agent written commands breaks on a trailing "&"
+    # or "# comment", and each command keeps its own timeout
     if test_commands:
         for cmd in test_commands:
             logger.info(f"Rerunning test command: {cmd}")
             session.send_command(cmd)
     
     if print_commands:
+        output_chunks: list[str] = []
         for cmd in print_commands:
             logger.info(f"Running print command: {cmd}")
             result = session.send_command(cmd)
-            test_output += result.output
-
-    
-    if "parser" in state:
-        current_parser = state.get("parser", "")
-    
-    if "test_status" in state:
-        current_results = state.get("test_status", {})
+            output_chunks.append(result.output)
+        test_output = "".join(output_chunks)
 
     logger.info("-" * 10 + "Start parse log conversation" + "-" * 10)
+
+    if len(test_output) > 15000:
+        test_output_str = test_output[:15000] + "..."
+    else:
+        test_output_str = test_output
+    current_results_str = _dump_results(current_results, 2000, "...")
     
     messages = [
         SystemMessage(
-            system_msg.format(
-                test_output=test_output[:15000] + "..." if len(test_output) > 15000 else test_output,
+            _build_system_msg(
+                test_output=test_output_str,
                 current_parser=current_parser,
-                current_results=json.dumps(current_results, indent=2)[:2000] + "..." if len(json.dumps(current_results, indent=2)) > 2000 else json.dumps(current_results, indent=2),
+                current_results=current_results_str,
                 steps=max_steps,
-            )
+            ),
+            additional_kwargs={"cache_control": PROMPT_CACHE_CONTROL},
         ),
         HumanMessage(
             ReAct_prompt.format(
-                tools=ParseLogAction.__doc__,
+                tools=_ACTION_DOC,
                 project_structure=state.get("repo_structure", ""),
                 docs=state.get("docs", ""),
-            )
+            ),
+            additional_kwargs={"cache_control": PROMPT_CACHE_CONTROL},
         ),
     ]
     
-    prefix_messages = len(messages)
+    prefix_messages = list(messages)
+    # Use conversation window to avoid context overflow
+    window_messages = deque(maxlen=PARSELOG_CONVERSATION_WINDOW)
+    recent_observations = deque(maxlen=PARSELOG_STALL_LIMIT)
+    stall_parser = improved_parser
     step = 0
     
     # Store test_output in state for testing
     state["test_output"] = test_output
+    test_output_digest = digest(test_output)
     
     while step < max_steps:
             
         step += 1
         
-        # Use conversation window to avoid context overflow
-        if len(messages) < PARSELOG_CONVERSATION_WINDOW + prefix_messages:
-            input_messages = messages
-        else:
-            input_messages = (
-                messages[:prefix_messages] + messages[-PARSELOG_CONVERSATION_WINDOW:]
-            )
-            
+        input_messages = prefix_messages + list(window_messages)
         response = llm.invoke(input_messages)
         update_accumulative_cost(cost["organize"], response)
 
-        logger.info(f"\n{response.pretty_repr()}\n\n{form_llm_cost_log(response)}\n")
+        if logger.isEnabledFor(logging.INFO):
+            logger.info("\n%s\n\n%s\n", response.pretty_repr(), form_llm_cost_log(response))
         messages.append(response)
+        window_messages.append(response)
         
         action = parse_parselog_action(response.content)
         observation = observation_for_parselog_action(state, action)
@@ -304,20 +345,31 @@ Parser executed successfully. Please analyze the results and submit if satisfied
         if observation.is_stop:
             answer = observation.content
             break
+
+        if improved_parser != stall_parser:
+            stall_parser = improved_parser
+            recent_observations.clear()
+        recent_observations.append(hash(observation.content))
+        if len(recent_observations) == PARSELOG_STALL_LIMIT and len(set(recent_observations)) == 1:
+            logger.info(f"Parse log agent stalled with {PARSELOG_STALL_LIMIT} identical observations, stopping early")
+            break
             
         message = HumanMessage(f"Observation:\n{observation.content}")
-        logger.info("\n" + message.pretty_repr())
+        if logger.isEnabledFor(logging.INFO):
+            logger.info("\n%s", message.pretty_repr())
         messages.append(message)
+        window_messages.append(message)
 
     logger.info("-" * 10 + "End parse log conversation" + "-" * 10)
     
     # Use the final improved parser if success else keep the old test status if the new parser does not return any result
     if improved_test_status:
         final_test_status = improved_test_status
-        final_parser = improved_parser
+        # not improved_parser: a later script may have failed after this status was produced
+        final_parser = status_parser
     else:
-        final_test_status = state.get("test_status", {})
-        final_parser = state.get("parser", "")
+        final_test_status = current_results
+        final_parser = current_parser
     
     return {
         "messages": messages,
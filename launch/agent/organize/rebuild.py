@@ -1,28 +1,35 @@
 """
 Environment setup agent for repository testing environment preparation.
 """
-import json
+import hashlib
+import logging
+import re
 import shutil
+import threading
 import time
+from collections import OrderedDict, deque
+from functools import lru_cache
+from string import Template
 from typing import Any, Literal, ClassVar  
 
 from langchain_core.messages import BaseMessage, HumanMessage, SystemMessage
 from pydantic import BaseModel, Field
 
 from launch.agent.action_parser import ActionParser
-from launch.agent.prompt import ReAct_prompt
-from launch.agent.state import AgentState, auto_catch
+from launch.agent.prompt import ReAct_prompt, format_command_history
+from launch.agent.state import AgentState, auto_catch, search_web
 from launch.core.runtime import SetupRuntime
+from launch.utilities import fastjson
 from launch.utilities.language_handlers import get_language_handler
-from launch.utilities.llm import form_llm_cost_log, update_accumulative_cost
+from launch.utilities.llm import PROMPT_CACHE_CONTROL, form_llm_cost_log, update_accumulative_cost
 
-system_msg = """You are a developer. You have already set up all dependencies and successfully built the repository in the current folder.
+system_msg = Template("""You are a developer. You have already set up all dependencies and successfully built the repository in the current folder.
 Now, for project maintenance, you must organize the minimal commands required to re-install only modified packages and re-build the project after any edits to the source code or package list.
 
 Environment details:
 - You are inside a Docker container with the source code already present at /testbed.
 - All dependencies have been previously installed by you.
-- The complete command history of your setup process is available as {commands}.
+- The command history of your setup process:$commands
 
 Your workflow process:
 1. You may execute commands inside the container multiple times to inspect files, verify changes, or explore the repo.
@@ -41,7 +48,7 @@ Find the minimal set of commands required to:
 Output requirements:
 Submit your minimal re-install and re-build commands in a single line using <submit>.
 The system will automatically test them and provide feedback if they fail.
-You must complete this in {steps} steps."""
+You must complete this in $steps steps.""")
 
 # Omit the following requirement for now:
 #   -> You are not allowed to edit code files in the project.
@@ -67,6 +74,9 @@ class SetupAction(BaseModel):
     args: Any = Field(None, description="The action arguments")
 
 
+_TOOLS_DOC: str = SetupAction.__doc__
+
+
 class SetupObservation(BaseModel):
     """Observation for the setup action"""
 
@@ -74,6 +84,9 @@ class SetupObservation(BaseModel):
     is_stop: bool = Field(False, description="Whether stop the setup loop")
 
 
+_ACTION_RE = re.compile(r"<(?P<tag>command|search|submit)>(?P<body>.*?)</(?P=tag)>", re.DOTALL)
+
+
 class SetupActionParser(ActionParser):
     """Parser for setup agent actions."""
     
@@ -81,25 +94,27 @@ class SetupActionParser(ActionParser):
         """Parse setup action from LLM response text."""
         response = self.clean_response(response)
         
-        command = self.extract_tag_content(response, "command")
-        if command:
-            return SetupAction(action="command", args=command)
-            
-        search = self.extract_tag_content(response, "search")
-        if search:
-            return SetupAction(action="search", args=search)
-            
-        submit = self.extract_tag_content(response, "submit")
-        if submit:
-            return SetupAction(action="submit", args=submit)
+        # one scan for all three tags, the first non-empty action in the response wins
+        for match in _ACTION_RE.finditer(response):
+            if match["body"]:
+                return SetupAction(action=match["tag"], args=match["body"])
             
         return None
 
 
+_setup_action_parser = SetupActionParser()
+
+
+@lru_cache(maxsize=256)
+def _parse_cached(response: str) -> tuple[str, Any] | None:
+    action = _setup_action_parser.parse(response)
+    return (action.action, action.args) if action else None
+
+
 def parse_setup_action(response: str) -> SetupAction | None:
     """Parse setup action from LLM response text."""
-    parser = SetupActionParser()
-    return parser.parse(response)
+    parsed = _parse_cached(response)
+    return SetupAction(action=parsed[0], args=parsed[1]) if parsed else None
 
 
 def observation_for_setup_action(
@@ -118,7 +133,7 @@ def observation_for_setup_action(
     if (not action) or (not action.action):
         content = f"""\
 Please using following format after `Action: ` to make a valid action choice:
-{SetupAction.__doc__}
+{_TOOLS_DOC}
 """
         return SetupObservation(content=content, is_stop=False)
     if action.action == "command":
@@ -126,8 +141,7 @@ Please using following format after `Action: ` to make a valid action choice:
         result = session.send_command(action.args)
         return SetupObservation(content=result.to_observation(), is_stop=False)
     if action.action == "search":
-        result = state["search_tool"].invoke(action.args)
-        return SetupObservation(content=json.dumps(result), is_stop=False)
+        return SetupObservation(content=search_web(state, action.args), is_stop=False)
     if action.action == "submit":
         return SetupObservation(content=action.args, is_stop=True)
 
@@ -180,12 +194,77 @@ def reload_container(state: AgentState) -> dict:
     return {
         "pypiserver": server,  # Keep name for backward compatibility
         "session": session,
+        "repo_root_dirty": False,
     }
 
 SETUP_CONVERSATION_WINDOW = 40
+VERIFICATION_CACHE_SIZE = 512
+# Cap on the one-word verdict. LiteLLMModel drops it only for models it detects as reasoning ones
+# (litellm metadata, thinking / reasoning_effort args); for undetected ones the reasoning can use up
+# the cap, so a cut off answer without a verdict is asked again uncapped
+VERIFICATION_MAX_TOKENS = 8
+# Failure markers that make a zero exit code ambiguous (e.g. the last of several ";"-joined commands succeeded)
+_FAILURE_RE = re.compile(r"\b(error|failed|failure|fatal|traceback)\b", re.IGNORECASE)
+
+# (submitted commands, verification output) digest -> LLM verdict
+_verification_cache: OrderedDict[str, bool] = OrderedDict()
+_verification_cache_lock = threading.Lock()
+
+
+def _verification_key(submitted_commands: str, verification_output: str) -> str:
+    h = hashlib.blake2b(digest_size=16)
+    h.update(submitted_commands.encode(errors="ignore"))
+    h.update(b"\0")
+    h.update(verification_output.encode(errors="ignore"))
+    return h.hexdigest()
+
+
+def _get_cached_verification(submitted_commands: str, verification_output: str) -> bool | None:
+    """Return the verdict of an identical earlier verification, or None."""
+    key = _verification_key(submitted_commands, verification_output)
+    with _verification_cache_lock:
+        verdict = _verification_cache.get(key)
+        if verdict is not None:
+            _verification_cache.move_to_end(key)
+        return verdict
+
+
+def _cache_verification(submitted_commands: str, verification_output: str, verdict: bool) -> None:
+    key = _verification_key(submitted_commands, verification_output)
+    with _verification_cache_lock:
+        _verification_cache[key] = verdict
+        if len(_verification_cache) > VERIFICATION_CACHE_SIZE:
+            _verification_cache.popitem(last=False)
+
+
+def _parse_verdict(content: str) -> bool | None:
+    """True for SUCCESS, False for FAILURE, None if the answer contains neither."""
+    content = content.strip().upper()
+    if "SUCCESS" in content:
+        return True
+    if "FAILURE" in content:
+        return False
+    return None
+
+
+def is_obvious_success(return_code: int, verification_output: str) -> bool:
+    """
+    Whether the verification clearly passed without asking the LLM:
+    zero exit code and no failure marker near the end of the output.
+    
+    Args:
+        return_code (int): The return code from command execution
+        verification_output (str): The output from executing the commands
+        
+    Returns:
+        bool: True if the rebuild obviously succeeded, False if it needs LLM analysis
+    """
+    return return_code == 0 and not _FAILURE_RE.search(verification_output[-4096:])
 
 
-def analyze_verification_with_llm(llm, submitted_commands: str, verification_output: str) -> BaseMessage:
+def analyze_verification_with_llm(
+    llm, submitted_commands: str, verification_output: str, max_tokens: int | None = VERIFICATION_MAX_TOKENS
+) -> BaseMessage:
     """
     Use LLM to analyze verification results and determine if rebuild was successful.
     
@@ -193,10 +272,10 @@ def analyze_verification_with_llm(llm, submitted_commands: str, verification_out
         llm: The language model to use for analysis
         submitted_commands (str): The commands that were submitted for verification
         verification_output (str): The output from executing the commands
-        return_code (int): The return code from command execution
+        max_tokens (int | None): Cap on the generated tokens, None for no cap
         
     Returns:
-        bool: True if LLM determines rebuild was successful, False otherwise
+        BaseMessage: LLM response containing SUCCESS if the rebuild was successful, FAILURE otherwise
     """
     analysis_prompt = f"""You are an expert developer analyzing the results of rebuild command execution.
 
@@ -221,9 +300,86 @@ Respond with EXACTLY one of these two words:
 
 Your response:"""
 
-    response = llm.invoke([HumanMessage(analysis_prompt)])
+    # the answer is a single word, no need to decode more
+    response = llm.invoke([HumanMessage(analysis_prompt)], max_tokens=max_tokens)
     return response
 
+def verify_rebuild_commands(state: AgentState, submitted_commands: str) -> tuple[bool, str]:
+    """
+    Execute rebuild commands in the container and decide whether they succeeded.
+    
+    Args:
+        state (AgentState): Current agent state with session and llm
+        submitted_commands (str): The rebuild commands to verify
+        
+    Returns:
+        tuple[bool, str]: Whether the rebuild succeeded, and the execution output
+    """
+    llm = state["llm"]
+    cost = state["cost"]
+    logger = state["logger"]
+    logger.info("Automatically verifying submitted commands...")
+    
+    # Execute the submitted commands to verify they work
+    session = state["session"]
+    verification_result = session.send_command(submitted_commands)
+    verification_output = verification_result.to_observation()
+    
+    # Use LLM to analyze verification results instead of just checking return code,
+    # unless the result is unambiguous
+    return_code = int(verification_result.metadata.exit_code) if verification_result.metadata else -1
+    if is_obvious_success(return_code, verification_output):
+        logger.info("Commands exited with 0 and no error in output, skipping LLM analysis")
+        return True, verification_output
+
+    verification_success = _get_cached_verification(submitted_commands, verification_output)
+    if verification_success is not None:
+        logger.info("Identical verification output analyzed before, reusing the verdict")
+        return verification_success, verification_output
+
+    response = analyze_verification_with_llm(
+        llm, submitted_commands, verification_output
+    )
+    update_accumulative_cost(cost["organize"], response)
+    logger.info(form_llm_cost_log(response))
+    verdict = _parse_verdict(response.content)
+    if verdict is None and response.response_metadata.get("finish_reason") == "length":
+        logger.info("Verification answer was cut off before the verdict, asking again without a token cap")
+        response = analyze_verification_with_llm(
+            llm, submitted_commands, verification_output, max_tokens=None
+        )
+        update_accumulative_cost(cost["organize"], response)
+        logger.info(form_llm_cost_log(response))
+        verdict = _parse_verdict(response.content)
+    if verdict is None:
+        # empty or cut off answer, not cached so that a retry reaches the model again
+        logger.warning(f"Verification answer has neither SUCCESS nor FAILURE: {response.content!r}")
+        return False, verification_output
+    _cache_verification(submitted_commands, verification_output, verdict)
+    return verdict, verification_output
+
+
+def known_rebuild_commands(state: AgentState) -> str | None:
+    """
+    Rebuild commands verified by an earlier organize run of this instance, either carried
+    by the instance (rebuild_cmds, see launch.scripts.collect) or left in result.json.
+    None when the run overwrites earlier results, it must rebuild from scratch.
+    """
+    if state.get("overwrite", False):
+        return None
+    cmds = state["instance"].get("rebuild_cmds")
+    if not cmds:
+        try:
+            with open(state["result_path"]) as f:
+                history = f.read()
+        except FileNotFoundError:
+            return None
+        cmds = fastjson.loads(history).get("rebuild_commands") if history.strip() else None
+    if not cmds:
+        return None
+    return ";".join(cmds) if isinstance(cmds, list) else cmds
+
+
 @auto_catch
 def organize_setup(state: AgentState, max_steps: int) -> dict:
     """
@@ -241,8 +397,27 @@ def organize_setup(state: AgentState, max_steps: int) -> dict:
     cost = state["cost"]
     logger = state["logger"]
 
+    # Try the rebuild commands of an earlier run first, the conversation is only needed if they fail
+    known_commands = known_rebuild_commands(state)
+    if known_commands is not None:
+        logger.info(f"Trying previously verified rebuild commands: {known_commands}")
+        verification_success, _ = verify_rebuild_commands(state, known_commands)
+        if verification_success:
+            logger.info("Verification PASSED - reusing previous rebuild commands")
+            return {
+                "session": state["session"],
+                "messages": [],
+                "commands": [known_commands],
+                "setup_messages": [],
+                "setup_commands": [known_commands],
+                "success": True,
+                "cost": cost,
+            }
+        logger.info("Previous rebuild commands failed, starting the rebuild conversation")
+
     hints = "\n\n"
-    history_cmds = state["instance"].get("setup_cmds", [])
+    # copy, extending the instance's list in place would grow the prompt prefix on every retry
+    history_cmds = list(state["instance"].get("setup_cmds", []))
     history_cmds += state["instance"].get("test_cmds", [])
     platform_hints = ""
     if state["platform"] == "windows":
@@ -251,69 +426,60 @@ def organize_setup(state: AgentState, max_steps: int) -> dict:
 
     logger.info("-" * 10 + "Start rebuild conversation" + "-" * 10)
     messages = [
-        SystemMessage(system_msg.format(
-            commands=history_cmds,
-            steps=max_steps,
-        )),
+        SystemMessage(
+            system_msg.substitute(
+                commands=format_command_history(history_cmds),
+                steps=max_steps,
+            ),
+            additional_kwargs={"cache_control": PROMPT_CACHE_CONTROL},
+        ),
         HumanMessage(
             ReAct_prompt.format(
-                tools=SetupAction.__doc__,
+                tools=_TOOLS_DOC,
                 project_structure=state["repo_structure"],
                 docs=state["docs"],
-            ) + hints
+            ) + hints,
+            additional_kwargs={"cache_control": PROMPT_CACHE_CONTROL},
         ),
     ]
     prefix_messages = len(messages)
+    prefix = list(messages)
+    window_messages = deque(maxlen=SETUP_CONVERSATION_WINDOW)
     step = 0
     commands = []
+    # only the latest commands are shown to the LLM, the full list is returned in the state
+    recent_commands = deque(maxlen=SETUP_CONVERSATION_WINDOW)
     answer = None
     while step < max_steps:
         step += 1
         # uses a window to avoid exceed context
+        # the command history changes every step, so it goes after the window to keep the
+        # invariant prefix (and the provider's prompt cache) as long as possible
+        recent_commands_str = "\n".join(recent_commands)
         commands_history = HumanMessage(
-            f"\nThe previous commands you have run:```\n{commands}```\nFollowing are the last {SETUP_CONVERSATION_WINDOW} messages:\n"
+            f"\nAbove are the last {SETUP_CONVERSATION_WINDOW} messages. The previous commands you have run:```\n{recent_commands_str}\n```\n"
         )
-        if len(messages) < SETUP_CONVERSATION_WINDOW + prefix_messages:
-            input_messages = (
-                messages[:prefix_messages]
-                + [commands_history]
-                + messages[prefix_messages:]
-            )
-        else:
-            input_messages = (
-                messages[:prefix_messages]
-                + [commands_history]
-                + messages[-SETUP_CONVERSATION_WINDOW:]
-            )
+        input_messages = prefix + list(window_messages) + [commands_history]
 
         response = llm.invoke(input_messages)
         update_accumulative_cost(cost["organize"], response)
 
-        logger.info(f"\n{response.pretty_repr()}\n\n{form_llm_cost_log(response)}\n")
+        if logger.isEnabledFor(logging.INFO):
+            logger.info("\n%s\n\n%s\n", response.pretty_repr(), form_llm_cost_log(response))
         messages.append(response)
+        window_messages.append(response)
         action = parse_setup_action(response.content)
         if action and action.action == "command":
             commands.append(action.args)
+            recent_commands.append(action.args)
         observation = observation_for_setup_action(state, action)
         if observation.is_stop:
             # Agent submitted commands, now automatically verify them
             submitted_commands = observation.content
             commands.append(submitted_commands)
+            recent_commands.append(submitted_commands)
             logger.info(f"Agent submitted commands: {submitted_commands}")
-            logger.info("Automatically verifying submitted commands...")
-            
-            # Execute the submitted commands to verify they work
-            session = state["session"]
-            verification_result = session.send_command(submitted_commands)
-            verification_output = verification_result.to_observation()
-            
-            # Use LLM to analyze verification results instead of just checking return code
-            response = analyze_verification_with_llm(
-                llm, submitted_commands, verification_output
-            )
-            update_accumulative_cost(cost["organize"], response)
-            logger.info(form_llm_cost_log(response))
-            verification_success = "SUCCESS" in response.content.strip().upper()
+            verification_success, verification_output = verify_rebuild_commands(state, submitted_commands)
             
             if verification_success:
                 # Verification passed according to LLM analysis
@@ -331,13 +497,17 @@ def organize_setup(state: AgentState, max_steps: int) -> dict:
                     f"Please analyze the error and provide different rebuild commands that will work. "
                     f"Be sure to verify on your own before submission."
                 )
-                logger.info("\n" + verification_message.pretty_repr())
+                if logger.isEnabledFor(logging.INFO):
+                    logger.info("\n%s", verification_message.pretty_repr())
                 messages.append(verification_message)
+                window_messages.append(verification_message)
                 continue
                 
         message = HumanMessage(f"Observation:\n{observation.content}")
-        logger.info("\n" + message.pretty_repr())
+        if logger.isEnabledFor(logging.INFO):
+            logger.info("\n%s", message.pretty_repr())
         messages.append(message)
+        window_messages.append(message)
 
     logger.info("-" * 10 + "End rebuild conversation" + "-" * 10)
     return {
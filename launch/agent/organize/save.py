@@ -1,9 +1,21 @@
-import json
 import os
 import shutil
 import time
+from concurrent.futures import ThreadPoolExecutor
 from launch.agent.state import AgentState, auto_catch
+from launch.utilities import fastjson
 from launch.utilities.language_handlers import get_language_handler
+from launch.utilities.workspace import save_repo_structure
+
+def _read_history(path: str) -> dict:
+    """Read the previous result.json of the instance, empty dict if there is none."""
+    try:
+        with open(path, "rb") as f:
+            history = f.read()
+    except FileNotFoundError:
+        return {}
+    return fastjson.loads(history) if history.strip() else {}
+
 
 #@auto_catch
 def save_organize_result(state: AgentState) -> dict:
@@ -20,25 +32,33 @@ def save_organize_result(state: AgentState) -> dict:
     instance_id = state["instance"]["instance_id"]
     logger = state["logger"]
     path = state["result_path"]
-    start_time = state["start_time"]
-    duration = time.time() - start_time
 
-    # transform to minutes
-    duration = int(duration / 60)
+    # host side clean up and history read do not touch the container, overlap them with the
+    # language cleanup and the commit (rmtree is in case unexpected error escapes previous clean-up,
+    # nothing writes the host copy again once reload_container removed it)
+    executor = ThreadPoolExecutor(max_workers=2)
+    rmtree_future = None
+    if state.get("repo_root_dirty", True):
+        rmtree_future = executor.submit(shutil.rmtree, state["repo_root"], ignore_errors=True)
+    history_future = executor.submit(_read_history, path)
+
+    start_time = state["start_time"]
+    # whole minutes, kept in integers
+    duration = (time.monotonic_ns() - start_time) // 60_000_000_000
 
     logger.info(f"Duration: {duration} minutes")
 
-    if not os.path.exists(os.path.dirname(path)):
-        os.makedirs(os.path.dirname(path))
+    os.makedirs(os.path.dirname(path), exist_ok=True)
 
-    exception = state.get("exception", None)
-    exception = str(exception) if exception else None
+    raw_exception = state.get("exception", None)
+    exception = str(raw_exception) if raw_exception else None
+    success = state.get("success", False)
 
-    if not exception and not state.get("success", False):
+    if not exception and not success:
         exception = "Organize failed"
 
-    if state["exception"]:
-        logger.error(f"!!! Exception: {state['exception']}")
+    if raw_exception:
+        logger.error(f"!!! Exception: {raw_exception}")
 
     session = state["session"]
 
@@ -52,7 +72,7 @@ def save_organize_result(state: AgentState) -> dict:
     except Exception as e:
         logger.warning(f"Failed to cleanup language environment: {e}")
 
-    if state.get("success", False):
+    if success:
         logger.info("Setup completed successfully, now commit into swebench image.")
 
         key = state["image_prefix"]
@@ -70,23 +90,19 @@ def save_organize_result(state: AgentState) -> dict:
             state["exception"] = err_msg
             exception = err_msg
 
-    # in case unexpected error escapes previous clean-up
-    if os.path.exists(state["repo_root"]):
-        shutil.rmtree(state["repo_root"], ignore_errors=True)
     try:
         session.cleanup()
     except Exception as e:
         logger.error(f"Failed to cleanup session: {e}")
 
-    if os.path.exists(path):
-        with open(path) as f:
-            history = f.read()
-            if history.strip():
-                history = json.loads(history)
-            else:
-                history = {}
-    else:
-        history = {}
+    if rmtree_future is not None:
+        rmtree_future.result()
+    history = history_future.result()
+    executor.shutdown()
+    # result.json of older versions carries the static repo metadata inline, move it out
+    history.pop("repo_structure", None)
+    history.pop("docs", None)
+    structure_file = save_repo_structure(path, state["repo_structure"], state["docs"], overwrite=False)
     
     if history.get("docker_image_layers", {}):
         previous_layers = history["docker_image_layers"]
@@ -105,7 +121,7 @@ def save_organize_result(state: AgentState) -> dict:
     else:
         cost = state["cost"]
 
-    result = json.dumps(
+    result = fastjson.dumps(
             {
                 **history,
                 "instance_id": instance_id,
@@ -122,10 +138,9 @@ def save_organize_result(state: AgentState) -> dict:
                 "cost": cost,
                 "organize_completed": state.get("success", False),
                 "exception": exception,
-                "repo_structure": state["repo_structure"],
-                "docs": state["docs"],
+                "structure_file": structure_file,
             },
-            indent=2,
+            indent=True,
         )
 
     # Save test_output to a separate log file
@@ -141,9 +156,8 @@ def save_organize_result(state: AgentState) -> dict:
     else:
         logger.info("No test output to save.")
     
-    with open(path, "w") as f:
+    with open(path, "w", encoding="utf-8") as f:
         f.write(result)
-    time.sleep(10)
     logger.info("Result saved to: " + str(path))
 
     return {
@@ -2,6 +2,7 @@
 Environment verification agent for testing repository setup correctness.
 """
 import json
+import logging
 import time
 from typing import Any, Literal
 
@@ -10,7 +11,7 @@ from pydantic import BaseModel, Field
 
 from launch.agent.action_parser import ActionParser
 from launch.agent.prompt import ReAct_prompt
-from launch.agent.state import AgentState, auto_catch
+from launch.agent.state import AgentState, auto_catch, search_web
 from launch.utilities.llm import form_llm_cost_log, update_accumulative_cost
 
 from launch.scripts.parser import run_get_pertest_cmd
@@ -160,13 +161,13 @@ def organize_unit_test(state: AgentState, max_steps: int) -> dict:
             pertest_command = json.dumps(generation_result) # str format
             trucated_test_commands: dict[str, str] = {} # To be sent into LLM
             session = state["session"]
-            start_time = time.time()
+            deadline = time.monotonic() + MAX_EXECUTION_TIME
             execution_result: dict[str, str] = dict()
             all_len = 0
             for testcase in generation_result.keys():
                 if all_len > EXECUTION_TRUNCATE_LENGTH:
                     break
-                if time.time() - start_time > MAX_EXECUTION_TIME:
+                if time.monotonic() > deadline:
                     break
                 trucated_test_commands[testcase] = generation_result[testcase]
                 execution_result[testcase] = session.send_command(trucated_test_commands[testcase]).to_observation()
@@ -188,8 +189,7 @@ If you think it is impossible to run each testcase separately, give up by output
 """
             return SetupObservation(content=result, is_stop=False)
         if action.action == "search":
-            result = state["search_tool"].invoke(action.args)
-            return SetupObservation(content=json.dumps(result), is_stop=False)
+            return SetupObservation(content=search_web(state, action.args), is_stop=False)
         if action.action == "submit":
             if ("success" in action.args) and (len(json.loads(pertest_command)) == 0):
                 observation = "You submit your answer with <submit>success</submit>. But we cannot find any correct per-testcase execution commands in history. Please explore the correct per-testcase commands again and write the python script to generate all per-testcase commands again. If you find it is impossible to run a specific testcase, output <submit>failure</submit> instead."
@@ -252,7 +252,8 @@ If you think it is impossible to run each testcase separately, give up by output
         response = llm.invoke(input_messages)
         update_accumulative_cost(cost["organize"], response)
 
-        logger.info(f"\n{response.pretty_repr()}\n\n{form_llm_cost_log(response)}\n")
+        if logger.isEnabledFor(logging.INFO):
+            logger.info("\n%s\n\n%s\n", response.pretty_repr(), form_llm_cost_log(response))
         messages.append(response)
         action = parse_verify_action(response.content)
         observation = observation_for_verify_action(state, action)
@@ -262,7 +263,8 @@ If you think it is impossible to run each testcase separately, give up by output
         if action and action.action == "command":
             commands.append(action.args)
         message = HumanMessage(f"Observation:\n{observation.content}")
-        logger.info("\n" + message.pretty_repr())
+        if logger.isEnabledFor(logging.INFO):
+            logger.info("\n%s", message.pretty_repr())
         messages.append(message)
 
     logger.info("-" * 10 + "End unit test conversation" + "-" * 10)
@@ -41,3 +41,12 @@ For develop environment, following points can be omitted:
 - Lint errors (e.g. mypy type checking or linting)
 - Warnings
 """
+
+
+def format_command_history(commands: list[str], limit: int = 50) -> str:
+    """Render the last limit commands as a bullet list for embedding in a system prompt."""
+    shown = commands[-limit:]
+    lines = [f"- {command}" for command in shown]
+    if len(commands) > len(shown):
+        lines.insert(0, f"- ... ({len(commands) - len(shown)} earlier commands omitted)")
+    return "\n" + "\n".join(lines) if lines else " (none)"
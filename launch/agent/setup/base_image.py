@@ -1,12 +1,17 @@
 """
 Base Docker image selection agent for repository environment setup.
 """
+import re
+
 from langchain.schema import HumanMessage
 
 from launch.agent.state import AgentState, auto_catch
 from launch.utilities.language_handlers import get_language_handler
 from launch.utilities.llm import form_llm_cost_log, update_accumulative_cost
 
+_IMAGE_RE = re.compile(r"<image>(.*?)</image>", re.DOTALL)
+_WRAP_HINT = "Wrap the image name in a block like <image>ubuntu:20.04</image> , <image>python:3.12-windowsservercore-ltsc2025</image>, <image>cimg/android:2026.03.1-browsers</image>, to indicate your choice."
+
 
 @auto_catch
 def select_base_image(state: AgentState) -> dict:
@@ -37,6 +42,12 @@ def select_base_image(state: AgentState) -> dict:
     # Get language handler and candidate images
     language_handler = get_language_handler(language)
     candidate_images = language_handler.base_images(platform = platform)
+    candidate_set = frozenset(candidate_images)
+    # the candidates do not change between retries, render them once
+    candidate_str = str(candidate_images)
+    retry_msg = f"{_WRAP_HINT} Please select again."
+    wrong_image_prefix = "The image you selected("
+    wrong_image_suffix = f") is not in the candidate list: {candidate_str}. {retry_msg}"
     messages = [
         HumanMessage(
             content=f"""Based on related file:
@@ -50,36 +61,42 @@ Please recommend a suitable base Docker image. Consider:
 {consideration}
 
 Select one base image from the following candidate list:
-{candidate_images}
-Wrap the image name in a block like <image>ubuntu:20.04</image> , <image>python:3.12-windowsservercore-ltsc2025</image>, <image>cimg/android:2026.03.1-browsers</image>, to indicate your choice.
+{candidate_str}
+{_WRAP_HINT}
 """
         )
     ]
     base_image = None
     trials = 0
-    while not base_image or trials < 5:
+    while trials < 5 and base_image is None:
         trials += 1
         response = llm.invoke(messages)
         update_accumulative_cost(cost["preparation"], response)
-        if "<image>" in response.content:
-            image = response.content.split("<image>")[1].split("</image>")[0]
-            if image in candidate_images:
+        match = _IMAGE_RE.search(response.content) if "<image>" in response.content else None
+        if match:
+            image = match.group(1)
+            if image in candidate_set:
                 base_image = image
                 break
             messages.append(response)
             messages.append(
                 HumanMessage(
-                    content=f"""The image you selected({image}) is not in the candidate list: {candidate_images}. Wrap the image name in a block like <image>ubuntu:20.04</image> , <image>python:3.12-windowsservercore-ltsc2025</image>, <image>cimg/android:2026.03.1-browsers</image>, to indicate your choice. Please select again."""
+                    content=wrong_image_prefix + image + wrong_image_suffix
                 )
             )
         else:
             messages.append(response)
             messages.append(
                 HumanMessage(
-                    content="""Wrap the image name in a block like <image>ubuntu:20.04</image> , <image>python:3.12-windowsservercore-ltsc2025</image>, <image>cimg/android:2026.03.1-browsers</image>, to indicate your choice. Please select again."""
+                    content=retry_msg
                 )
             )
 
+    if base_image is None:
+        # the LLM never picked a valid candidate, fall back to the first one
+        base_image = next(iter(candidate_images))
+        logger.warning(f"No valid base image selected after {trials} trials, falling back to {base_image}")
+
     logger.info(f"Selected base image: {base_image}  {form_llm_cost_log(response)}")
     return {
         "messages": messages,
@@ -1,9 +1,11 @@
-import json
 import os
 import shutil
 import time
+from concurrent.futures import ThreadPoolExecutor
 from launch.agent.state import AgentState, auto_catch
+from launch.utilities import fastjson
 from launch.utilities.language_handlers import get_language_handler
+from launch.utilities.workspace import save_repo_structure
 
 #@auto_catch
 def save_setup_result(state: AgentState) -> dict:
@@ -19,25 +21,31 @@ def save_setup_result(state: AgentState) -> dict:
     instance_id = state["instance"]["instance_id"]
     logger = state["logger"]
     path = state["result_path"]
-    start_time = state["start_time"]
-    duration = time.time() - start_time
 
-    # transform to minutes
-    duration = int(duration / 60)
+    # the host copy of the repo is not used by the container, remove it while the
+    # language cleanup and the commit run (in case unexpected error escapes previous clean-up)
+    executor = ThreadPoolExecutor(max_workers=1)
+    rmtree_future = None
+    if os.path.exists(state["repo_root"]):
+        rmtree_future = executor.submit(shutil.rmtree, state["repo_root"], ignore_errors=True)
+
+    start_time = state["start_time"]
+    # whole minutes, kept in integers
+    duration = (time.monotonic_ns() - start_time) // 60_000_000_000
 
     logger.info(f"Duration: {duration} minutes")
 
-    if not os.path.exists(os.path.dirname(path)):
-        os.makedirs(os.path.dirname(path))
+    os.makedirs(os.path.dirname(path), exist_ok=True)
 
-    exception = state.get("exception", None)
-    exception = str(exception) if exception else None
+    raw_exception = state.get("exception", None)
+    exception = str(raw_exception) if raw_exception else None
+    success = state.get("success", False)
 
-    if not exception and not state.get("success", False):
+    if not exception and not success:
         exception = "Launch failed"
 
-    if state["exception"]:
-        logger.error(f"!!! Exception: {state['exception']}")
+    if raw_exception:
+        logger.error(f"!!! Exception: {raw_exception}")
 
     session = state["session"]
 
@@ -51,7 +59,7 @@ def save_setup_result(state: AgentState) -> dict:
     except Exception as e:
         logger.warning(f"Failed to cleanup language environment: {e}")
 
-    if state.get("success", False):
+    if success:
         logger.info("Setup completed successfully, now commit into swebench image.")
 
         key = state["image_prefix"]
@@ -70,14 +78,15 @@ def save_setup_result(state: AgentState) -> dict:
             exception = err_msg
             
 
-    # in case unexpected error escapes previous clean-up
-    if os.path.exists(state["repo_root"]):
-        shutil.rmtree(state["repo_root"], ignore_errors=True)
     try:
         session.cleanup()
     except Exception as e:
         logger.error(f"Failed to cleanup session: {e}")
 
+    if rmtree_future is not None:
+        rmtree_future.result()
+    executor.shutdown()
+
     docker_image_layers = {
         "base_image": state["base_image"],
         "setup_layer": [
@@ -87,7 +96,8 @@ def save_setup_result(state: AgentState) -> dict:
         ]
     }
     
-    result = json.dumps(
+    structure_file = save_repo_structure(path, state["repo_structure"], state["docs"])
+    result = fastjson.dumps(
             {
                 "instance_id": instance_id,
                 "docker_image": state.get("docker_image", None),
@@ -98,13 +108,12 @@ def save_setup_result(state: AgentState) -> dict:
                 "cost": state["cost"],
                 "completed": state.get("success", False),
                 "exception": exception,
-                "repo_structure": state["repo_structure"],
-                "docs": state["docs"],
+                "structure_file": structure_file,
             },
-            indent=2,
+            indent=True,
         )
     
-    with open(path, "w") as f:
+    with open(path, "w", encoding="utf-8") as f:
         f.write(result)
     time.sleep(10)
     logger.info("Result saved to: " + str(path))
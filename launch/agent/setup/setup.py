@@ -1,7 +1,7 @@
 """
 Environment setup agent for repository testing environment preparation.
 """
-import json
+import logging
 import shutil
 import time
 from typing import Any, Literal, ClassVar  
@@ -11,7 +11,7 @@ from pydantic import BaseModel, Field
 
 from launch.agent.action_parser import ActionParser
 from launch.agent.prompt import ReAct_prompt
-from launch.agent.state import AgentState, auto_catch
+from launch.agent.state import AgentState, auto_catch, search_web
 from launch.core.runtime import SetupRuntime
 from launch.utilities.language_handlers import get_language_handler
 from launch.utilities.llm import form_llm_cost_log, update_accumulative_cost
@@ -144,8 +144,7 @@ Please using following format after `Action: ` to make a valid action choice:
         result = session.send_command(action.args)
         return SetupObservation(content=result.to_observation(), is_stop=False, exit_code=result.metadata.exit_code)
     if action.action == "search":
-        result = state["search_tool"].invoke(action.args)
-        return SetupObservation(content=json.dumps(result), is_stop=False, exit_code=0)
+        return SetupObservation(content=search_web(state, action.args), is_stop=False, exit_code=0)
     if action.action == "stop":
         return SetupObservation(content="", is_stop=True, exit_code=0)
 
@@ -303,7 +302,8 @@ def setup(state: AgentState, max_steps: int) -> dict:
         response = llm.invoke(input_messages)
         update_accumulative_cost(cost["setup"], response)
 
-        logger.info(f"\n{response.pretty_repr()}\n\n{form_llm_cost_log(response)}\n")
+        if logger.isEnabledFor(logging.INFO):
+            logger.info("\n%s\n\n%s\n", response.pretty_repr(), form_llm_cost_log(response))
         messages.append(response)
         action = parse_setup_action(response.content)
         observation = observation_for_setup_action(state, action)
@@ -313,7 +313,8 @@ def setup(state: AgentState, max_steps: int) -> dict:
             break
         message = HumanMessage(f"Observation:\n{observation.content}")
         # print(observation.content)
-        logger.info("\n" + message.pretty_repr())
+        if logger.isEnabledFor(logging.INFO):
+            logger.info("\n%s", message.pretty_repr())
         messages.append(message)
 
     logger.info("-" * 10 + "End setup agent conversation" + "-" * 10)
@@ -1,6 +1,7 @@
 """
 Environment verification agent for testing repository setup correctness.
 """
+import logging
 from typing import Any, Literal
 
 from langchain.schema import HumanMessage, SystemMessage
@@ -186,7 +187,8 @@ def verify(state: AgentState, max_steps: int) -> dict:
         response = llm.invoke(input_messages)
         update_accumulative_cost(cost["setup"], response)
 
-        logger.info(f"\n{response.pretty_repr()}\n\n{form_llm_cost_log(response)}\n")
+        if logger.isEnabledFor(logging.INFO):
+            logger.info("\n%s\n\n%s\n", response.pretty_repr(), form_llm_cost_log(response))
         messages.append(response)
         action = parse_verify_action(response.content)
         if action.action == "command":
@@ -194,7 +196,8 @@ def verify(state: AgentState, max_steps: int) -> dict:
         observation = observation_for_verify_action(action, session)
         message = HumanMessage(f"Observation:\n{observation.content}")
         # print(message.pretty_repr())
-        logger.info(message.pretty_repr())
+        if logger.isEnabledFor(logging.INFO):
+            logger.info("%s", message.pretty_repr())
         messages.append(message)
         if action.action == "issue":
             if observation.content == "":
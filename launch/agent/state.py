@@ -1,16 +1,13 @@
 """
 Agent state management for repository setup workflow.
 """
-import json
 import operator
-import os
 import time
 import traceback
-from functools import wraps
+from functools import lru_cache, wraps
 from logging import Logger
-from typing import Annotated, Any, Callable, List, Union
+from typing import TYPE_CHECKING, Annotated, Any, Callable, List, Union
 
-from langchain_community.tools.tavily_search import TavilySearchResults
 from langchain_core.messages import (
     AIMessage,
     HumanMessage,
@@ -21,8 +18,14 @@ from langgraph.graph.message import add_messages
 from typing_extensions import Literal, Self, TypedDict
 
 from launch.core.runtime import SetupRuntime
+from launch.utilities import fastjson
 from launch.utilities.timemachine import PyPiServer
 from launch.utilities.llm import LLMProvider
+from launch.utilities.workspace import load_repo_structure
+
+if TYPE_CHECKING:
+    # importing langchain_community takes about a second, it is deferred to the first search
+    from langchain_community.tools.tavily_search import TavilySearchResults
 
 
 class State(TypedDict):
@@ -46,7 +49,7 @@ class AgentState(State):
     messages: Annotated[
         List[Union[HumanMessage, AIMessage, SystemMessage, ToolMessage]], add_messages
     ]
-    search_tool: TavilySearchResults
+    max_search_results: int # see get_search_tool
     setup_messages: Annotated[
         List[Union[HumanMessage, AIMessage, SystemMessage, ToolMessage]], add_messages
     ]
@@ -57,6 +60,7 @@ class AgentState(State):
     print_commands: List[str]
     commands: Annotated[List[str], operator.add]
     repo_root: str
+    repo_root_dirty: bool # whether the host copy of the repo may still exist and need removal
     repo_structure: str
     result_path: str
     date: str | None
@@ -66,7 +70,7 @@ class AgentState(State):
     pypiserver: PyPiServer | None
     current_issue: str | None
     success: bool | None
-    start_time: float | None
+    start_time: int | None # time.monotonic_ns() at creation, only meaningful for durations
     trials: int
     debug: bool
     platform: str
@@ -81,6 +85,8 @@ class AgentState(State):
     cost: dict[Literal["preparation","setup","organize"], dict[Literal["input_tokens","output_tokens","cost_usd"], int|float]]
     result: str
     command_timeout: int # minute
+    overwrite: bool # rerun from scratch, results of earlier runs must not be reused
+    test_setup_cache_dir: str | None # cached test setups of earlier runs, None when disabled
 
     @classmethod
     def create(
@@ -98,6 +104,8 @@ class AgentState(State):
         debug: bool = False,
         platform: str = "linux",
         command_timeout: int = 30,
+        overwrite: bool = False,
+        test_setup_cache_dir: str | None = None,
     ) -> Self:
         """
         Create a new AgentState instance with default values.
@@ -113,18 +121,14 @@ class AgentState(State):
             date (str, optional): Creation date of the instance
             max_search_results (int): Maximum search results for web search
             debug (bool): Enable debug mode
+            overwrite (bool): Whether the run ignores results of earlier runs
+            test_setup_cache_dir (str | None): Directory of cached test setups, None disables the cache
             
         Returns:
             Self: Initialized AgentState instance
         """
 
-        docs = None
-        if os.path.exists(result_path):
-            with open(result_path) as f:
-                history = f.read()
-            if history.strip():
-                history = json.loads(history)
-                docs = history.get("docs", None)
+        docs = load_repo_structure(result_path).get("docs", None)
 
         return cls(
             instance=instance,
@@ -132,7 +136,7 @@ class AgentState(State):
             language=language,
             logger=logger,
             messages=[],
-            search_tool=TavilySearchResults(max_results=max_search_results),
+            max_search_results=max_search_results,
             setup_messages=[],
             verify_messages=[],
             setup_commands=[],
@@ -140,6 +144,7 @@ class AgentState(State):
             print_commands=[],
             commands=[],
             repo_root=repo_root,
+            repo_root_dirty=True,
             repo_structure=repo_structure,
             image_prefix=image_prefix,
             result_path=result_path,
@@ -147,7 +152,7 @@ class AgentState(State):
             docs=docs,
             base_image=None,
             session=None,
-            start_time=time.time(),
+            start_time=time.monotonic_ns(),
             pypiserver=None,
             current_issue=None,
             success=None,
@@ -181,9 +186,59 @@ class AgentState(State):
             },
             result="",
             command_timeout=command_timeout,
+            overwrite=overwrite,
+            test_setup_cache_dir=test_setup_cache_dir,
         )
 
 
+@lru_cache(maxsize=None)
+def _search_tool(max_results: int) -> "TavilySearchResults":
+    from langchain_community.tools.tavily_search import TavilySearchResults
+
+    return TavilySearchResults(max_results=max_results)
+
+
+def get_search_tool(state: AgentState) -> "TavilySearchResults":
+    """
+    Web search tool of the state, created on the first search action and shared by all instances.
+    
+    Args:
+        state (AgentState): Current agent state
+        
+    Returns:
+        TavilySearchResults: Search tool returning at most max_search_results results
+    """
+    return _search_tool(state["max_search_results"])
+
+
+# Characters kept of each search result, page extracts are long and stay in every later LLM call
+SEARCH_CONTENT_LIMIT = 800
+
+
+def search_web(state: AgentState, query: str) -> str:
+    """
+    Search the web and render the results as an observation.
+    
+    Args:
+        state (AgentState): Current agent state
+        query (str): Search query
+        
+    Returns:
+        str: JSON list of title, url and content (capped at SEARCH_CONTENT_LIMIT) of each result
+    """
+    result = get_search_tool(state).invoke(query)
+    if isinstance(result, list):
+        result = [
+            {
+                "title": r.get("title", ""),
+                "url": r.get("url", ""),
+                "content": (r.get("content") or "")[:SEARCH_CONTENT_LIMIT],
+            }
+            for r in result if isinstance(r, dict)
+        ]
+    return fastjson.dumps(result)
+
+
 def auto_catch(func: Callable[..., dict]) -> Callable[..., dict]:
     """
     Decorator to automatically catch exceptions in workflow functions.
@@ -37,6 +37,8 @@ def setup(instance: dict, workspace: WorkSpace):
         date=instance.get("created_at", None),
         platform=workspace.platform,
         command_timeout=workspace.timeout,
+        overwrite=workspace.overwrite,
+        test_setup_cache_dir=workspace.test_setup_cache_dir,
     )
 
     final_state = initial_state
@@ -81,6 +83,8 @@ def organize(instance: dict, workspace: WorkSpace):
         date=instance.get("created_at", None),
         platform=workspace.platform,
         command_timeout=workspace.timeout,
+        overwrite=workspace.overwrite,
+        test_setup_cache_dir=workspace.test_setup_cache_dir,
     )
 
     final_state = initial_state
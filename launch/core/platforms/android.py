@@ -12,7 +12,8 @@ from launch.core.platforms.base import (
 )
 from launch.core.platforms.base import (
     CmdOutputMetadata,
-    CommandResult
+    CommandResult,
+    docker_client
 )
 from launch.core.platforms.linux import LinuxRuntime
 
@@ -51,12 +52,12 @@ class AndroidRuntime(LinuxRuntime):
         command_timeout: int,
     ) -> AndroidRuntime:
         try:
-            docker.from_env().ping()
+            docker_client().ping()
         except docker.errors.DockerException:
             raise RuntimeError("Docker is not installed or not running.")
 
         _ = cls.pull_image(image_name)
-        client = docker.from_env(timeout=docker_timeout)
+        client = docker_client(timeout=docker_timeout)
         container_name = f"git-launch-{container_id}-{str(uuid.uuid4())[:4]}"
         info = client.version()
         engine_os = (info.get("Os") or info.get("OSType") or "").lower()
@@ -135,8 +136,8 @@ class AndroidRuntime(LinuxRuntime):
         git_install_cmd = "command -v git >/dev/null || (apt-get update && apt-get install -y git)"
         repo_clone_cmd = f"git config --global --add safe.directory /testbed; git init /testbed; cd /testbed; git remote add origin {url}; git fetch --depth 1 origin {base_commit}; git reset --hard {base_commit}"
         session.preparation_commands.extend([git_install_cmd, repo_clone_cmd])
-        session.send_command(git_install_cmd)
-        res: CommandResult = session.send_command(repo_clone_cmd)
+        session.exec_command(git_install_cmd)
+        res: CommandResult = session.exec_command(repo_clone_cmd)
         session.send_command("ls")
 
         if int(res.metadata.exit_code) != 0:
@@ -1,13 +1,13 @@
 from __future__ import annotations
 from abc import ABC, abstractmethod
-import io
 import json
 import os
 import re
 import tarfile
+import threading
 from dataclasses import dataclass
-from pathlib import Path
-from typing import Any, Literal
+from functools import lru_cache
+from typing import Any, Callable, Iterator, Literal
 
 import docker
 from docker.models.containers import Container
@@ -19,12 +19,43 @@ CMD_OUTPUT_METADATA_PS1_REGEX = re.compile(
     r"(?m)^\s*" + re.escape(CMD_OUTPUT_PS1_BEGIN.strip()) + r"\s*(.*?)\s*" + re.escape(CMD_OUTPUT_PS1_END.strip()),
     re.DOTALL
 )
+# Built once: the template is constant, json.dumps + escaping need not run per container
+PS1_PROMPT = (
+    CMD_OUTPUT_PS1_BEGIN
+    # Escape double quotes so that PS1 keeps them as part of the output
+    + json.dumps(
+        {
+            "exit_code": "$?",
+            "username": r"\u",
+            "hostname": r"\h",
+            "working_dir": r"$(pwd)",
+            "py_interpreter_path": r'$(which python 2>/dev/null || echo "")',
+        },
+        indent=2,
+    ).replace('"', r"\"")
+    + CMD_OUTPUT_PS1_END
+    + "\n"  # Ensure there's a newline at the end
+)
 ANSI_ESCAPE = re.compile(r"\x1B(?:[@-Z\\-_]|\[[0-?]*[ -/]*[@-~])")
 
 TIMEOUT_EXIT_CODE = 124
 
 MEM_LIMIT = "16g"
 CPU_CORES = 4
+TAR_STREAM_CHUNK = 64 * 1024
+
+
+@lru_cache(maxsize=None)
+def docker_client(timeout: int | None = None) -> docker.DockerClient:
+    """
+    Process-wide docker client per timeout.
+
+    docker.from_env resolves the socket and negotiates the API version on every call,
+    so sessions share one client instead of building a new one per call.
+    """
+    if timeout is None:
+        return docker.from_env()
+    return docker.from_env(timeout=timeout)
 
 
 VAR_PATTERNS = {
@@ -60,36 +91,14 @@ class CmdOutputMetadata:
         Returns:
             str: PS1 prompt configuration for capturing metadata
         """
-        prompt = CMD_OUTPUT_PS1_BEGIN
-        json_str = json.dumps(
-            {
-                "exit_code": "$?",
-                "username": r"\u",
-                "hostname": r"\h",
-                "working_dir": r"$(pwd)",
-                "py_interpreter_path": r'$(which python 2>/dev/null || echo "")',
-            },
-            indent=2,
-        )
-        # Make sure we escape double quotes in the JSON string
-        # So that PS1 will keep them as part of the output
-        prompt += json_str.replace('"', r"\"")
-        prompt += CMD_OUTPUT_PS1_END + "\n"  # Ensure there's a newline at the end
-        return prompt
+        return PS1_PROMPT
 
     @classmethod
     def matches_ps1_metadata(cls, output: str) -> list[re.Match[str]]:
-        matches = []
-        for match in CMD_OUTPUT_METADATA_PS1_REGEX.finditer(output):
-            scope = match.group(1).strip()
-            try:
-                d = json.loads(scope)  # Try to parse as JSON
-                matches.append(match)
-            except json.JSONDecodeError:
-                d = cls.best_effort_match(scope)
-                if len(d) > 0:
-                    matches.append(match)
-        return matches
+        # Every candidate is kept: a scope that is not valid JSON still yields all fields
+        # through best_effort_match. Parsing is left to from_ps1_match, which only runs
+        # on the match that is used, instead of json.loads on each candidate per poll.
+        return list(CMD_OUTPUT_METADATA_PS1_REGEX.finditer(output))
     
     @classmethod
     def best_effort_match(cls, scope: str) -> dict:
@@ -150,17 +159,21 @@ class CommandResult:
         Returns:
             str: Formatted observation with output and context
         """
-        # compile regex once for efficiency
-        ANSI_ESCAPE = re.compile(r"\x1B(?:[@-Z\\-_]|\[[0-?]*[ -/]*[@-~])")
-        
-        output = ANSI_ESCAPE.sub("", self.output).replace("\r", "")
-
-        if len(output) > 1024 * 16 and strip:
-            output = (
-                output[: 1024 * 8]
-                + "....stripped due to length....\n"
-                + output[-1024 * 8 :]
-            )
+        raw = self.output
+        if strip and len(raw) > 1024 * 64:
+            # far beyond the limit: only clean the windows that are kept, with a margin
+            # for escape sequences and a sequence cut in half at the window edge
+            head = ANSI_ESCAPE.sub("", raw[: 1024 * 16]).replace("\r", "")
+            tail = ANSI_ESCAPE.sub("", raw[-1024 * 16 :]).replace("\r", "")
+            output = head[: 1024 * 8] + "....stripped due to length....\n" + tail[-1024 * 8 :]
+        else:
+            output = ANSI_ESCAPE.sub("", raw).replace("\r", "")
+            if len(output) > 1024 * 16 and strip:
+                output = (
+                    output[: 1024 * 8]
+                    + "....stripped due to length....\n"
+                    + output[-1024 * 8 :]
+                )
 
         if self.metadata is None:
             return f"\n{output}\n"
@@ -196,6 +209,38 @@ class BaseRuntime(ABC):
     def apply_patch(self, patch: str, verbose: bool = False) -> bool:
         pass
     
+    def _put_archive_streaming(self, dest: str, build: Callable[[tarfile.TarFile], None]) -> None:
+        """
+        Upload a tar archive to the container while it is being built.
+
+        The archive is written in streaming mode by a background thread into a pipe
+        and sent to docker chunk by chunk, so it is never held in memory as a whole.
+        """
+        read_fd, write_fd = os.pipe()
+        errors: list[BaseException] = []
+
+        def writer() -> None:
+            try:
+                with os.fdopen(write_fd, "wb") as pipe, tarfile.open(fileobj=pipe, mode="w|") as tar:
+                    build(tar)
+            except BaseException as e:
+                errors.append(e)
+
+        def chunks(pipe) -> Iterator[bytes]:
+            while chunk := pipe.read(TAR_STREAM_CHUNK):
+                yield chunk
+
+        thread = threading.Thread(target=writer, daemon=True)
+        thread.start()
+        try:
+            with os.fdopen(read_fd, "rb") as pipe:
+                # closing the read end on failure unblocks the writer with a broken pipe
+                self.container.put_archive(dest, chunks(pipe))
+        finally:
+            thread.join()
+        if errors:
+            raise errors[0]
+
     def copy_to_container(self, src: str, dest: str) -> None:
         """
         Copy local file or directory 'src' into the container at path 'dest'.
@@ -204,10 +249,9 @@ class BaseRuntime(ABC):
         are placed inside 'dest' in the container. If 'src' is a single file,
         it is placed inside 'dest' (which is typically a directory).
         """
-        tar_stream = io.BytesIO()
         src = os.path.abspath(src)
 
-        with tarfile.open(fileobj=tar_stream, mode="w") as tar:
+        def build(tar: tarfile.TarFile) -> None:
             if os.path.isdir(src):
                 # Add directory contents so they appear directly under `dest`.
                 tar.add(src, arcname=".")
@@ -215,24 +259,21 @@ class BaseRuntime(ABC):
                 # Add a single file using its basename.
                 tar.add(src, arcname=os.path.basename(src))
 
-        tar_stream.seek(0)
-
         # Put the archive into the container. `dest` must exist and be a directory
         # when copying directories, or you'll need to ensure it's the appropriate file path
         # when copying a single file.
-        self.container.put_archive(dest, tar_stream)
+        self._put_archive_streaming(dest, build)
 
     def copy_dir_to_container(self, src: str, dest: str) -> None:
 
-        src = Path(src)
-        tar_stream = io.BytesIO()
-        with tarfile.open(fileobj=tar_stream, mode="w") as tar:
-            for file_path in src.rglob("*"):
-                arcname = file_path.relative_to(src)
-                tar.add(str(file_path), arcname=str(arcname))
-        tar_stream.seek(0)
+        def build(tar: tarfile.TarFile) -> None:
+            # tar.add already recurses, so only the top-level entries are listed here;
+            # each path is walked and stat-ed exactly once
+            with os.scandir(src) as entries:
+                for entry in entries:
+                    tar.add(entry.path, arcname=entry.name)
 
-        self.container.put_archive(path=dest, data=tar_stream.read())
+        self._put_archive_streaming(dest, build)
         if self.platform in ("linux", "android"):
             self.send_command(f'chown -R root:root "{dest}"')
 
@@ -249,7 +290,7 @@ class BaseRuntime(ABC):
         print(f"Image {image_name}:{tag} created successfully.")
 
         if push:
-            client = docker.from_env()
+            client = docker_client()
             client.images.push(image_name, tag=tag)
             print(f"Image {image_name}:{tag} pushed successfully.")
 
@@ -269,7 +310,7 @@ class BaseRuntime(ABC):
         Returns:
             bool: True if successful, False if image not found
         """
-        client = docker.from_env(timeout=3600) # pull should finish in 1 hour
+        client = docker_client(timeout=3600) # pull should finish in 1 hour
         try:
             # Check if image exists locally
             client.images.get(image_name)
@@ -293,7 +334,7 @@ class BaseRuntime(ABC):
             print(f"Failed to stop container: {e}")
         if prune_dangling:
             try:
-                client = docker.from_env()
+                client = docker_client()
                 client.images.prune(filters={'dangling': True})
             except Exception as e:
                 print(e, "...Skipping...")
@@ -1,24 +1,28 @@
 from __future__ import annotations
 
 from launch.core.platforms.base import (
-    CMD_OUTPUT_PS1_BEGIN,
     CMD_OUTPUT_PS1_END,
     CMD_OUTPUT_METADATA_PS1_REGEX,
     ANSI_ESCAPE,
     TIMEOUT_EXIT_CODE,
     MEM_LIMIT,
     CPU_CORES,
-    VAR_PATTERNS
+    VAR_PATTERNS,
+    PS1_PROMPT,
 )
 from launch.core.platforms.base import (
     CmdOutputMetadata,
     CommandResult,
+    docker_client,
     BaseRuntime
 )
 
-import os, json
-from typing import Any, Optional
-import queue
+import os
+import re
+from typing import Any, Callable, Optional
+from collections import deque
+import selectors
+import socket
 import threading
 import time
 import uuid
@@ -26,7 +30,17 @@ import uuid
 import docker
 from docker.models.containers import Container
 
+PS1_END_MARKER = CMD_OUTPUT_PS1_END.strip().encode()
+# ANSI_ESCAPE is pure ASCII, so the bytes version matches the same sequences in UTF-8 output
+ANSI_ESCAPE_BYTES = re.compile(ANSI_ESCAPE.pattern.encode())
+# Raw output re-examined before each new chunk, covers a marker split across chunks with escapes around it
+PS1_SCAN_OVERLAP = 256
+RECV_CHUNK_SIZE = 64 * 1024
+
 class LinuxRuntime(BaseRuntime):
+    # socket read/write methods, resolved once on first use
+    _reader: Callable[[int], bytes] | None = None
+    _writer: Callable[[bytes], Any] | None = None
 
     def __init__(
                     self, 
@@ -48,33 +62,26 @@ class LinuxRuntime(BaseRuntime):
         self.sock = self.container.attach_socket(
             params={"stdin": 1, "stdout": 1, "stderr": 1, "stream": 1}
         )
-        self.output_queue: queue.Queue[bytes] = queue.Queue()
+        # single producer (output thread) / single consumer; deque append and popleft are atomic
+        self._chunks: deque[bytes] = deque()
+        self._data_event = threading.Event()
+        self._selector: selectors.BaseSelector | None = None
         self.stopped = False
         self._start_output_thread()
         self._clear_initial_prompt()
-        json_str = json.dumps(
-            {
-                "exit_code": "$?",
-                "username": r"\u",
-                "hostname": r"\h",
-                "working_dir": r"$(pwd)",
-                "py_interpreter_path": r'$(which python 2>/dev/null || echo "")',
-            },
-            indent=2,
-        ).replace('"', r"\"")
-        ps1 = CMD_OUTPUT_PS1_BEGIN + json_str + CMD_OUTPUT_PS1_END + "\n"
         self.send_command(
-            f'export PROMPT_COMMAND=\'export PS1="{ps1}"\'; export PS2=""'
+            f'export PROMPT_COMMAND=\'export PS1="{PS1_PROMPT}"\'; export PS2=""'
         )
         self.preparation_commands = []
 
     def _stream_output(self):
         while True:
             try:
-                output = self._recv_bytes(4096)
+                output = self._recv_bytes(RECV_CHUNK_SIZE)
                 if not output:
                     break
-                self.output_queue.put(output)
+                self._chunks.append(output)
+                self._data_event.set()
             except (OSError, ConnectionError) as e:
                 print(f"Connection error in _stream_output: {e}")
                 break
@@ -83,35 +90,100 @@ class LinuxRuntime(BaseRuntime):
                 break
 
     def _start_output_thread(self):
+        # A real socket on a POSIX host is read directly by the consumer, the reader thread covers the rest.
+        # Registration alone proves nothing: docker's NpipeSocket on Windows hosts has a fileno(),
+        # but select() only works on sockets there.
+        raw_sock = getattr(self.sock, "_sock", self.sock)
+        if os.name != "nt" and isinstance(raw_sock, socket.socket):
+            selector = selectors.DefaultSelector()
+            try:
+                selector.register(self.sock, selectors.EVENT_READ)
+            except (ValueError, OSError, TypeError):
+                selector.close()
+            else:
+                self._selector = selector
+                return
         self.output_thread = threading.Thread(target=self._stream_output, daemon=True)
         self.output_thread.start()
 
+    def _fall_back_to_output_thread(self, error: Exception) -> None:
+        print(f"Selecting on the socket failed, reading it from a thread instead: {error}")
+        self._selector.close()
+        self._selector = None
+        self.output_thread = threading.Thread(target=self._stream_output, daemon=True)
+        self.output_thread.start()
+
+    def _poll_output(self, timeout: float) -> bool:
+        """
+        Wait up to timeout seconds for socket output.
+
+        Returns:
+            bool: whether output chunks are pending in self._chunks
+        """
+        if self._selector is None:
+            # cleared before checking, so a chunk appended meanwhile still wakes the wait below
+            self._data_event.clear()
+            if not self._chunks:
+                self._data_event.wait(timeout=timeout)
+            return bool(self._chunks)
+        try:
+            ready = self._selector.select(timeout=timeout)
+        except (OSError, ValueError) as e:
+            self._fall_back_to_output_thread(e)
+            return self._poll_output(timeout)
+        if ready:
+            try:
+                output = self._recv_bytes(RECV_CHUNK_SIZE)
+            except (OSError, ConnectionError) as e:
+                print(f"Connection error in _poll_output: {e}")
+                output = b""
+            if output:
+                self._chunks.append(output)
+            else:
+                # closed socket stays readable, stop selecting on it
+                self._selector.close()
+                self._selector = None
+        return bool(self._chunks)
+
     def _clear_initial_prompt(self):
         time.sleep(1)
-        while not self.output_queue.empty():
-            self.output_queue.get()
+        if self._selector is not None:
+            # nothing reads the socket in between, drain what it already holds
+            while self._poll_output(0):
+                self._chunks.clear()
+        self._chunks.clear()
+        self._data_event.clear()
 
     def _read_raw_output(self, timeout:int=30) -> tuple[str, Optional[CmdOutputMetadata]]:
         '''
         timeout: in seconds
         '''
         
-        accumulated_output = ""
-        start_time = time.time()
-
-        while time.time() - start_time < timeout:
-            try:
-                chunk = self.output_queue.get(timeout=0.1)
-                accumulated_output += chunk.decode("utf-8", errors="ignore")
-                # PSReadLine injects ANSI + cursor control; normalize before matching
-                accumulated_clean = ANSI_ESCAPE.sub("", accumulated_output).replace("\r", "")
-                ps1_matches = CmdOutputMetadata.matches_ps1_metadata(accumulated_clean)
-                if ps1_matches:
-                    break
-            except queue.Empty:
+        # raw bytes, decoded once at the end so multi-byte characters split across chunks survive
+        accumulated_output = bytearray()
+        accumulated_clean = None
+        ps1_matches = []
+        start_time = time.monotonic()
+
+        while time.monotonic() - start_time < timeout:
+            if not self._poll_output(0.1):
                 continue
-        accumulated_output = ANSI_ESCAPE.sub("", accumulated_output).replace("\r", "")
-        ps1_matches = CmdOutputMetadata.matches_ps1_metadata(accumulated_output)
+            scan_start = max(0, len(accumulated_output) - PS1_SCAN_OVERLAP)
+            while self._chunks:
+                accumulated_output.extend(self._chunks.popleft())
+            # PSReadLine injects ANSI + cursor control; normalize before matching
+            # cheap check on the new tail first, the whole output is only matched once a prompt may have ended
+            recent = ANSI_ESCAPE_BYTES.sub(b"", accumulated_output[scan_start:]).replace(b"\r", b"")
+            if PS1_END_MARKER not in recent:
+                continue
+            accumulated_clean = ANSI_ESCAPE.sub("", accumulated_output.decode("utf-8", errors="ignore")).replace("\r", "")
+            ps1_matches = CmdOutputMetadata.matches_ps1_metadata(accumulated_clean)
+            if ps1_matches:
+                break
+        if not ps1_matches:
+            accumulated_clean = ANSI_ESCAPE.sub("", accumulated_output.decode("utf-8", errors="ignore")).replace("\r", "")
+            ps1_matches = CmdOutputMetadata.matches_ps1_metadata(accumulated_clean)
+        accumulated_output = accumulated_clean
         metadata = (
             CmdOutputMetadata.from_ps1_match(ps1_matches[-1]) if ps1_matches else None
         )
@@ -137,30 +209,66 @@ class LinuxRuntime(BaseRuntime):
         return "\n".join(output_segments) + "\n" if output_segments else ""
 
     def _recv_bytes(self, n=4096) -> bytes:
+        if self._reader is None:
+            self._reader = self._resolve_reader()
+        return self._reader(n)
+
+    def _resolve_reader(self) -> Callable[[int], bytes]:
         # Prefer the public API on whatever object the SDK returns
         for m in ("recv", "read"):
             if hasattr(self.sock, m):
-                return getattr(self.sock, m)(n)
+                return getattr(self.sock, m)
         # Last-resort fallback for odd wrappers that still expose ._sock
         if hasattr(self.sock, "_sock"):
             for m in ("recv", "read"):
                 if hasattr(self.sock._sock, m):
-                    return getattr(self.sock._sock, m)(n)
+                    return getattr(self.sock._sock, m)
         raise TypeError(f"Don't know how to read from {type(self.sock).__name__}")
 
     def _send_bytes(self, data: bytes) -> None:
+        if self._writer is None:
+            self._writer = self._resolve_writer()
+        self._writer(data)
+
+    def _resolve_writer(self) -> Callable[[bytes], Any]:
+        # sendall first: a partial send() would drop the rest of the shell input
         if hasattr(self.sock, "_sock"):
-            for m in ("send", "sendall", "write"):
+            for m in ("sendall", "send", "write"):
                 if hasattr(self.sock._sock, m):
-                    getattr(self.sock._sock, m)(data)
-                    return
-        for m in ("send", "sendall", "write"):
+                    return getattr(self.sock._sock, m)
+        for m in ("sendall", "send", "write"):
             if hasattr(self.sock, m):
-                getattr(self.sock, m)(data)
-                return
+                return getattr(self.sock, m)
 
         raise TypeError(f"Don't know how to write to {type(self.sock).__name__}")
 
+    def exec_command(self, command: str, timeout: int|None = None) -> CommandResult:
+        """
+        Run a one-shot, non-interactive command through the docker exec API.
+
+        The output comes back in a single response instead of going through the
+        interactive shell and its PS1 parsing, so this suits bulky setup steps
+        (package installs, clones). Shell state such as cwd or exported variables
+        does not carry over to the interactive session.
+
+        timeout: in minutes, self.command_timeout if not specified. The exec API has no
+        deadline of its own, so the command runs under coreutils timeout and is killed
+        if it is still running 5 seconds after being asked to stop.
+        """
+        timeout = self.command_timeout * 60 if timeout is None else timeout * 60 # in seconds
+        exit_code, output = self.container.exec_run(
+            ["timeout", "-k", "5", str(timeout), "/bin/bash", "-c", command], workdir=self.working_dir
+        )
+        output = (output or b"").decode("utf-8", errors="ignore")
+        # 124: timeout sent TERM, 137 (-9 if not mapped by the engine): it had to KILL
+        if exit_code in (124, 137, -9):
+            output += "\n**Exited due to timeout**\n"
+            exit_code = TIMEOUT_EXIT_CODE
+        return CommandResult(
+            output=output,
+            metadata=CmdOutputMetadata(exit_code=exit_code, working_dir=self.working_dir),
+        )
+
     def send_command(self, command: str, timeout: int|None = None) -> CommandResult:
         '''
         timeout: deprecated arg for backward compatibility. In minute. If not specified use self.timeout from object inittialization.
@@ -229,12 +337,12 @@ class LinuxRuntime(BaseRuntime):
         command_timeout: int,
     ) -> LinuxRuntime:
         try:
-            docker.from_env().ping()
+            docker_client().ping()
         except docker.errors.DockerException:
             raise RuntimeError("Docker is not installed or not running.")
 
         _ = cls.pull_image(image_name)
-        client = docker.from_env(timeout=docker_timeout) # commit added layers should finish in 2 hours
+        client = docker_client(timeout=docker_timeout) # commit added layers should finish in 2 hours
         container_name = f"git-launch-{container_id}-{str(uuid.uuid4())[:4]}"
         info = client.version()
         engine_os = (info.get("Os") or info.get("OSType") or "").lower() 
@@ -347,8 +455,8 @@ class LinuxRuntime(BaseRuntime):
         git_install_cmd = "apt update && apt install -y git"
         repo_clone_cmd = f"git config --global --add safe.directory /testbed; git init /testbed; cd /testbed; git remote add origin {url}; git fetch --depth 1 origin {base_commit}; git reset --hard {base_commit}"
         session.preparation_commands.extend([git_install_cmd, repo_clone_cmd])
-        session.send_command(git_install_cmd)
-        res: CommandResult = session.send_command(repo_clone_cmd)
+        session.exec_command(git_install_cmd)
+        res: CommandResult = session.exec_command(repo_clone_cmd)
         session.send_command("ls")
         
         if int(res.metadata.exit_code) != 0:
@@ -12,13 +12,16 @@ from launch.core.platforms.base import (
 )
 from launch.core.platforms.base import (
     CmdOutputMetadata,
-    CommandResult
+    CommandResult,
+    docker_client
 )
 from launch.core.platforms.linux import LinuxRuntime
 
 import os
 from typing import Any
-import queue
+from collections import deque
+import selectors
+import threading
 import uuid
 
 import docker
@@ -47,7 +50,10 @@ class WindowsRuntime(LinuxRuntime):
         self.sock = self.container.attach_socket(
             params={"stdin": 1, "stdout": 1, "stderr": 1, "stream": 1}
         )
-        self.output_queue: queue.Queue[bytes] = queue.Queue()
+        # single producer (output thread) / single consumer; deque append and popleft are atomic
+        self._chunks: deque[bytes] = deque()
+        self._data_event = threading.Event()
+        self._selector: selectors.BaseSelector | None = None
         self.stopped = False
         self._start_output_thread()
         self._clear_initial_prompt()
@@ -130,12 +136,12 @@ function prompt {
         command_timeout: int,
     ) -> WindowsRuntime:
         try:
-            docker.from_env().ping()
+            docker_client().ping()
         except docker.errors.DockerException:
             raise RuntimeError("Docker is not installed or not running.")
 
         _ = cls.pull_image(image_name)
-        client = docker.from_env(timeout=docker_timeout) # commit added layers should finish in 2 hours
+        client = docker_client(timeout=docker_timeout) # commit added layers should finish in 2 hours
         container_name = f"git-launch-{container_id}-{str(uuid.uuid4())[:4]}"
         info = client.version()
         engine_os = (info.get("Os") or info.get("OSType") or "").lower() 
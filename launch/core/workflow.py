@@ -1,7 +1,7 @@
 """
 Defines the workflow graph for repository environment setup and verification.
 """
-from functools import partial
+from functools import lru_cache, partial
 
 from langgraph.graph import END, START, StateGraph
 
@@ -13,9 +13,12 @@ from launch.agent.setup.verify import verify
 from launch.agent.setup.save import save_setup_result
 
 
+# Compiled graphs hold no run state, so every instance with the same limits shares one
+@lru_cache(maxsize=8)
 def define_setup_workflow(max_trials: int = 3, max_steps_setup: int = 20, max_steps_verify: int = 20):
     """
     Define the workflow graph for repository environment setup.
+    The compiled graph is cached per argument combination.
     
     Args:
         max_trials (int): Maximum number of setup/verify retry attempts
@@ -62,9 +65,11 @@ from launch.agent.organize.parselog import generate_log_parser
 from launch.agent.organize.testone import organize_unit_test
 from launch.agent.organize.save import save_organize_result
 
+@lru_cache(maxsize=8)
 def define_organize_workflow(max_steps: int = 20, get_pertest_cmd: bool = True):
     """
     Define the workflow graph for repository environment setup.
+    The compiled graph is cached per argument combination.
     
     Args:
         max_steps (int): Maximum steps allowed for each organize agent
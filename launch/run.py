@@ -4,7 +4,6 @@ Orchestrates the execution of repository launches across multiple instances.
 This module provides functionality to process SWE-bench instances in parallel,
 setting up environments and executing launches with progress tracking.
 """
-import json
 import os
 import shutil
 import threading
@@ -23,6 +22,7 @@ from rich.progress import (
 )
 
 from launch.core.entry import setup, organize
+from launch.utilities import fastjson
 from launch.utilities.config import Config, load_config
 from launch.utilities.workspace import prepare_workspace, safe_read_result
 from launch.scripts import collect
@@ -56,9 +56,9 @@ def setup_instance(instance, config, workspace_root):
     
     if not config.overwrite and os.path.exists(result_path):
         result_path = instance_path / "result.json"
-        result = (result_path).read_text()
+        result = (result_path).read_bytes()
         if result.strip():
-            result = json.loads(result)
+            result = fastjson.loads(result)
             if result["completed"]:
                 return "success", instance["instance_id"], None
             elif result.get("exception", "") == "Launch failed":
@@ -114,9 +114,9 @@ def organize_instance(instance, config, workspace_root):
 
     
     if not config.overwrite and os.path.exists(result_path):
-        result = (result_path).read_text()
+        result = (result_path).read_bytes()
         if result.strip():
-            result = json.loads(result)
+            result = fastjson.loads(result)
             if result.get("organize_completed", False):
                 return "success", instance["instance_id"], None
             elif result.get("exception", "") == "Organize failed":
@@ -325,8 +325,8 @@ def run_organize(config: Config, dataset: list):
 
 def run_launch(config_path):
     config: Config = load_config(config_path)
-    with open(config.dataset, "r") as f:
-        dataset = [json.loads(line) for line in f]
+    with open(config.dataset, "r", encoding="utf-8") as f:
+        dataset = [fastjson.loads(line) for line in f]
         instance_ids: list[str] = [instance["instance_id"] for instance in dataset]
     if config.mode["setup"]:
         run_setup(config, dataset)
@@ -334,8 +334,8 @@ def run_launch(config_path):
     if config.mode["organize"]:
         if not os.path.exists(f"{config.workspace_root}/setup.jsonl"):
             raise RuntimeError(f"{config.workspace_root}/setup.jsonl NOT FOUND. You need to finish the setup step first.")
-        with open(f"{config.workspace_root}/setup.jsonl") as f:
-            dataset = [json.loads(line) for line in f]
+        with open(f"{config.workspace_root}/setup.jsonl", encoding="utf-8") as f:
+            dataset = [fastjson.loads(line) for line in f]
         run_organize(config, dataset)
         collect.main(config.workspace_root, platform = config.platform, step = "organize", instance_ids = instance_ids)
     return
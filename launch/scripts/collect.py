@@ -1,8 +1,68 @@
-import json
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
 from pathlib import Path
 from typing import Literal, Optional
 from fire import Fire
 
+from launch.utilities import fastjson
+
+COLLECT_WORKERS = 32
+
+
+def _load(
+    subfolder: Path,
+    platform: Literal["linux", "windows"],
+    step: Literal["setup", "organize"],
+    instance_ids: Optional[list[str]],
+) -> Optional[dict]:
+    if not subfolder.is_dir():
+        return None
+
+    instance_path = subfolder / "instance.json"
+    result_path = subfolder / "result.json"
+
+    if not instance_path.exists() or not result_path.exists():
+        return None
+
+    # bytes go straight to the parser, no decode round-trip
+    result_data = result_path.read_bytes()
+    if not result_data.strip():
+        return None
+    result = fastjson.loads(result_data)
+
+    if (instance_ids is not None) and (result["instance_id"] not in instance_ids):
+        return None
+
+    if step == "setup" and (not result.get("completed", False)):
+        return None
+    if step == "organize" and (not result.get("organize_completed", False)):
+        return None
+
+    # only parsed for instances that are actually collected
+    instance = fastjson.loads(instance_path.read_bytes())
+    swe_instance = {
+        **instance,
+        "docker_image_layers": result.get("docker_image_layers", {}),
+        "setup_cmds": result.get("setup_commands", []),
+        "test_cmds": result.get("test_commands", []),
+        "print_cmds": result.get("print_commands", []),
+        "log_parser": result.get("log_parser", "pytest"),
+        "docker_image": result.get("docker_image", f"karinali20011210/migbench:{instance["instance_id"]}_{platform}"),
+    }
+    if result.get("rebuild_commands", ""):
+        swe_instance["rebuild_cmds"] = result["rebuild_commands"]
+    if result.get("test_status", ""):
+        swe_instance["test_status"] = result["test_status"]
+    if result.get("pertest_command", ""):
+        swe_instance["pertest_command"] = result["pertest_command"]
+    if result.get("log_parser", ""):
+        swe_instance["log_parser"] = result["log_parser"]
+    if result.get("unittest_generator", ""):
+        swe_instance["per_test_command_generator"] = result["unittest_generator"]
+
+    return swe_instance
+
+
 def main(
     workspace: str,
     platform: Literal["linux", "windows"] = "linux",
@@ -12,56 +72,17 @@ def main(
     workspace = Path(workspace)
     playground = workspace / "playground"
     output_jsonl = workspace / f"{step}.jsonl"
-    swe_instances = []
-    for subfolder in playground.iterdir():
-        if not subfolder.is_dir():
-            continue
-
-        instance_path = subfolder / "instance.json"
-        result_path = subfolder / "result.json"
-
-        if not instance_path.exists() or not result_path.exists():
-            continue
-
-        instance = json.loads(instance_path.read_text())
-        result = result_path.read_text()
-        if not result.strip():
-            continue
-        result = json.loads(result_path.read_text())
-
-        if (instance_ids is not None) and (result["instance_id"] not in instance_ids):
-            continue
-
-        if step == "setup" and (not result.get("completed", False)):
-            continue
-        if step == "organize" and (not result.get("organize_completed", False)):
-            continue
-        
-        swe_instance = {
-            **instance,
-            "docker_image_layers": result.get("docker_image_layers", {}),
-            "setup_cmds": result.get("setup_commands", []),
-            "test_cmds": result.get("test_commands", []),
-            "print_cmds": result.get("print_commands", []),
-            "log_parser": result.get("log_parser", "pytest"),
-            "docker_image": result.get("docker_image", f"karinali20011210/migbench:{instance["instance_id"]}_{platform}"),
-        }
-        if result.get("rebuild_commands", ""):
-            swe_instance["rebuild_cmds"] = result["rebuild_commands"]
-        if result.get("test_status", ""):
-            swe_instance["test_status"] = result["test_status"]
-        if result.get("pertest_command", ""):
-            swe_instance["pertest_command"] = result["pertest_command"]
-        if result.get("log_parser", ""):
-            swe_instance["log_parser"] = result["log_parser"]
-        if result.get("unittest_generator", ""):
-            swe_instance["per_test_command_generator"] = result["unittest_generator"]
-
-        swe_instances.append(swe_instance)
+    with ThreadPoolExecutor(max_workers=COLLECT_WORKERS) as executor:
+        # I/O bound: reads of the many small per-instance files overlap across threads
+        loaded = executor.map(
+            partial(_load, platform=platform, step=step, instance_ids=instance_ids),
+            playground.iterdir(),
+        )
+        swe_instances = [instance for instance in loaded if instance is not None]
 
-    with open(output_jsonl, "w") as f:
+    with open(output_jsonl, "w", encoding="utf-8") as f:
         for instance in swe_instances:
-            f.write(json.dumps(instance) + "\n")
+            f.write(fastjson.dumps(instance) + "\n")
     print(f"Saved {len(swe_instances)} instances to {output_jsonl}")
 
 if __name__ == "__main__":
@@ -1,9 +1,25 @@
+import ast
+import hashlib
 import io
+import os
+import re
+import subprocess
 import sys
+import threading
 import traceback
 import json
-from functools import wraps
-from typing import Callable
+from collections import OrderedDict
+from functools import lru_cache, wraps
+from typing import Any, Callable
+
+from launch.utilities import fastjson
+
+PARSER_RESULT_CACHE_SIZE = 32
+PARSER_TIMEOUT = 10
+
+# (script digest, log digest) -> run_parser result
+_parser_result_cache: OrderedDict[bytes, Any] = OrderedDict()
+_parser_cache_lock = threading.Lock()
 
 def capture_output(func: Callable) -> Callable:
     """Decorator to capture stdout/stderr and handle exceptions during function execution."""
@@ -25,11 +41,103 @@ def capture_output(func: Callable) -> Callable:
             sys.stdout, sys.stderr = old_out, old_err
     return wrapper
 
+@lru_cache(maxsize=64)
+def _compile_script(script: str) -> Any:
+    """Compile an LLM generated script once, agents often re-run the same one."""
+    return compile(script, "<parser>", "exec")
+
+# re functions hoisted by _RegexHoister -> positional argument count, pattern included
+_HOISTABLE_RE_CALLS = {"search": 2, "match": 2, "fullmatch": 2, "findall": 2, "finditer": 2, "split": 2, "sub": 3, "subn": 3}
+
+class _RegexHoister(ast.NodeTransformer):
+    """Rewrite re.<func>(<literal pattern>, ...) into a call on a module level pattern compiled once."""
+
+    def __init__(self):
+        self.patterns: dict[str | bytes, str] = {}
+
+    def visit_Call(self, node: ast.Call) -> ast.AST:
+        self.generic_visit(node)
+        func = node.func
+        if not (
+            isinstance(func, ast.Attribute)
+            and isinstance(func.value, ast.Name)
+            and func.value.id == "re"
+            and _HOISTABLE_RE_CALLS.get(func.attr) == len(node.args)
+            and not node.keywords
+            and isinstance(node.args[0], ast.Constant)
+            and isinstance(node.args[0].value, (str, bytes))
+        ):
+            return node
+        pattern = node.args[0].value
+        try:
+            # an invalid pattern must keep failing only when its line runs
+            re.compile(pattern)
+        except re.error:
+            return node
+        name = self.patterns.setdefault(pattern, f"_repolaunch_pattern_{len(self.patterns)}")
+        call = ast.Call(
+            func=ast.Attribute(value=ast.Name(id=name, ctx=ast.Load()), attr=func.attr, ctx=ast.Load()),
+            args=node.args[1:],
+            keywords=[],
+        )
+        return ast.copy_location(call, node)
+
+def _binds_re_to_stdlib(tree: ast.AST) -> bool:
+    """Whether the name re is only ever bound by import re, so re.search & co. are the stdlib ones."""
+    imported = False
+    for node in ast.walk(tree):
+        if isinstance(node, (ast.Import, ast.ImportFrom)):
+            for alias in node.names:
+                if (alias.asname or alias.name.split(".")[0]) != "re":
+                    continue
+                if isinstance(node, ast.ImportFrom) or alias.name != "re":
+                    return False
+                imported = True
+        elif isinstance(node, ast.Name) and node.id == "re" and not isinstance(node.ctx, ast.Load):
+            return False
+        elif isinstance(node, ast.arg) and node.arg == "re":
+            return False
+        elif isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)) and node.name == "re":
+            return False
+        elif isinstance(node, (ast.Global, ast.Nonlocal)) and "re" in node.names:
+            return False
+    return imported
+
+@lru_cache(maxsize=64)
+def _compile_parser(script: str) -> Any:
+    """
+    Compile a parser script with its literal regexes compiled once at load time,
+    generated parsers typically call re.search(r"...", line) for every log line.
+    Falls back to the unmodified script whenever the rewrite is not provably equivalent.
+    """
+    try:
+        tree = ast.parse(script, "<parser>")
+        if _binds_re_to_stdlib(tree):
+            hoister = _RegexHoister()
+            tree = hoister.visit(tree)
+            if hoister.patterns:
+                prelude = ast.parse(
+                    "import re as _repolaunch_re\n"
+                    + "".join(f"{name} = _repolaunch_re.compile({pattern!r})\n" for pattern, name in hoister.patterns.items())
+                ).body
+                index = 0
+                body = tree.body
+                if body and isinstance(body[0], ast.Expr) and isinstance(body[0].value, ast.Constant) and isinstance(body[0].value.value, str):
+                    index = 1
+                while index < len(body) and isinstance(body[index], ast.ImportFrom) and body[index].module == "__future__":
+                    index += 1
+                tree.body[index:index] = prelude
+                ast.fix_missing_locations(tree)
+                return compile(tree, "<parser>", "exec")
+    except Exception:
+        pass
+    return _compile_script(script)
+
 @capture_output
 def run_get_pertest_cmd(script: str, test_name_list: list[str]) -> dict[str, str]:
     # Create a namespace for exec
     namespace = {}
-    exec(script, namespace)
+    exec(_compile_script(script), namespace)
     
     # Check if get_pertest_cmd was defined in the script
     if 'get_pertest_cmd' not in namespace:
@@ -42,11 +150,92 @@ def run_get_pertest_cmd(script: str, test_name_list: list[str]) -> dict[str, str
 def run_parser(script: str, log: str) -> dict[str, str]:
     # Create a namespace for exec
     namespace = {}
-    exec(script, namespace)
+    exec(_compile_parser(script), namespace)
     
     # Check if parser was defined in the script
     if 'parser' not in namespace:
         raise NotImplementedError("Script must define 'parser' function")
     
     # Call the function from the namespace
-    return namespace['parser'](log)
\ No newline at end of file
+    return namespace['parser'](log)
+
+# Directory holding the launch package, so the parser subprocess imports this same copy
+_PACKAGE_PARENT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+def _parser_worker() -> None:
+    """Entry of the parser subprocess: JSON [script, log] on stdin, JSON run_parser result on stdout."""
+    out = sys.stdout.buffer
+    script, log = fastjson.loads(sys.stdin.buffer.read())
+    out.write(fastjson.dumps(run_parser(script, log)).encode())
+    out.flush()
+
+def _is_parser_result(value: Any) -> bool:
+    """Whether value has the shape run_parser returns: a dict of str to str, or an error string."""
+    if isinstance(value, str):
+        return True
+    return isinstance(value, dict) and all(isinstance(k, str) and isinstance(v, str) for k, v in value.items())
+
+def run_parser_with_timeout(script: str, log: str, timeout: int = PARSER_TIMEOUT) -> Any:
+    """
+    Run the parser in a fresh interpreter so a runaway script (e.g. catastrophic regex
+    backtracking) cannot hang the agent. Raises TimeoutError if it does not finish in time.
+
+    Every call gets its own process, so the timeout covers only this parser and killing it
+    leaves parsers of other instances running. The child is started with exec rather than
+    fork, locks held by threads of this process cannot deadlock it.
+    The result comes back as JSON, never pickle: the script can write anything to the
+    worker's stdout, so what is read back is only data and must have the shape of a parser
+    result. If the worker dies or returns anything else, the error is returned as a string,
+    like the errors of the script itself.
+    """
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [_PACKAGE_PARENT, env.get("PYTHONPATH")]))
+    try:
+        proc = subprocess.run(
+            [sys.executable, "-c", "from launch.scripts.parser import _parser_worker; _parser_worker()"],
+            input=fastjson.dumps([script, log]).encode(),
+            capture_output=True,
+            timeout=timeout,
+            env=env,
+        )
+    except subprocess.TimeoutExpired:
+        raise TimeoutError(f"Parser did not finish within {timeout} seconds")
+    if proc.returncode == 0:
+        try:
+            result = fastjson.loads(proc.stdout)
+        except ValueError:
+            result = None
+        if _is_parser_result(result):
+            return result
+    return f"stderr:\n{proc.stderr.decode(errors='replace')}\ntraceback:\nParser process failed with exit code {proc.returncode}"
+
+def digest(text: str) -> bytes:
+    return hashlib.blake2b(text.encode(errors="ignore"), digest_size=16).digest()
+
+def run_parser_cached(script: str, log: str, log_digest: bytes | None = None, runner: Callable = run_parser_with_timeout) -> Any:
+    """
+    Run the parser script on the log, reusing the result if the same pair was already run.
+
+    Args:
+        script (str): Parser script defining a parser(log) function
+        log (str): Test output passed to the parser
+        log_digest (bytes | None): digest(log), if the caller already has it
+        runner (Callable): Function actually running the script, run_parser_with_timeout by default
+
+    Returns:
+        Any: Same as runner, a copy of the cached dict on hit
+    """
+    if log_digest is None:
+        log_digest = digest(log)
+    key = digest(script) + log_digest
+    with _parser_cache_lock:
+        if key in _parser_result_cache:
+            _parser_result_cache.move_to_end(key)
+            result = _parser_result_cache[key]
+            return dict(result) if isinstance(result, dict) else result
+    result = runner(script, log)
+    with _parser_cache_lock:
+        _parser_result_cache[key] = result
+        if len(_parser_result_cache) > PARSER_RESULT_CACHE_SIZE:
+            _parser_result_cache.popitem(last=False)
+    return dict(result) if isinstance(result, dict) else result
@@ -19,6 +19,8 @@ class Config:
         first_N_repos (int): Limit processing to first N repos (-1 for all)
         max_workers (int): Number of parallel workers for processing
         overwrite (bool): Whether to overwrite existing results
+        git_cache (bool): Clone instances from a shared bare repo per GitHub repo under workspace_root/.cache/git
+        test_setup_cache (bool): Replay verified test setups of earlier runs from workspace_root/.cache/verify
     """
     print_to_console: bool
     model_config: dict
@@ -38,6 +40,8 @@ class Config:
     max_steps_organize: int = 20
     timeout: int = 30
     image_prefix: str = "repolaunch/dev"
+    git_cache: bool = False
+    test_setup_cache: bool = False
 
 
 def load_config(config_path: str) -> Config:
@@ -75,6 +79,8 @@ def load_config(config_path: str) -> Config:
         max_steps_organize=config_data.get("max_steps_organize", 20),
         timeout=config_data.get("cmd_timeout", 30), # timeout of a single command, in minute
         image_prefix=config_data.get("image_prefix", "repolaunch/dev"),
+        git_cache=config_data.get("git_cache", False),
+        test_setup_cache=config_data.get("test_setup_cache", False),
         mode=config_data.get(
             "mode", 
             {
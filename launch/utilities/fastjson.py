@@ -0,0 +1,52 @@
+"""
+JSON helpers that use orjson when it is installed and fall back to the stdlib json module.
+"""
+import json
+from typing import Any
+
+try:
+    import orjson
+except ImportError:  # optional dependency, see the `fast` extra in pyproject.toml
+    orjson = None
+
+
+def dumps(obj: Any, indent: bool = False) -> str:
+    """
+    Serialize obj to a JSON string, the text is the same with and without orjson installed
+    (except for floats, whose exponent notation differs).
+
+    Args:
+        obj (Any): Object to serialize
+        indent (bool): Pretty-print with an indent of 2 spaces
+
+    Returns:
+        str: JSON document
+    """
+    if orjson is not None:
+        option = orjson.OPT_NON_STR_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        try:
+            return orjson.dumps(obj, option=option).decode()
+        except TypeError:
+            # e.g. integers beyond 64 bit, which the stdlib encoder still handles
+            pass
+    # same text as orjson: compact separators and UTF-8 instead of \u escapes
+    if indent:
+        return json.dumps(obj, indent=2, ensure_ascii=False)
+    return json.dumps(obj, separators=(",", ":"), ensure_ascii=False)
+
+
+def loads(data: str | bytes) -> Any:
+    """
+    Deserialize a JSON document.
+
+    Args:
+        data (str | bytes): JSON document
+
+    Returns:
+        Any: Deserialized object
+    """
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
@@ -3,6 +3,8 @@ Repository structure visualization utilities for displaying directory trees.
 """
 import os
 import pathlib
+import subprocess
+import tempfile
 from rich import print
 from rich.markup import escape
 from rich.text import Text
@@ -22,7 +24,10 @@ you need to enable long path in windows setting
 
 def walk_directory(directory: pathlib.Path, tree: Tree, max_depth: int, current_depth: int = 0) -> None:
     """
-    Recursively build a Tree with directory contents, stopping at max_depth.
+    Build a Tree with directory contents, stopping at max_depth.
+
+    Uses os.scandir, whose entries carry the file type from the directory listing,
+    so most entries need no extra stat call.
     
     Args:
         directory (pathlib.Path): Directory to traverse
@@ -30,39 +35,65 @@ def walk_directory(directory: pathlib.Path, tree: Tree, max_depth: int, current_
         max_depth (int): Maximum depth to traverse (-1 for unlimited)
         current_depth (int): Current traversal depth
     """
-    if max_depth != -1 and current_depth >= max_depth:
-        return
+    ignore_dirs = {".git", ".svn", "__pycache__"}
+    ignore_files = {".DS_Store", ".gitignore", ".gitattributes"}
+    # branches are attached to their parent before descending, so visiting order does not change the tree
+    stack = [(str(directory), tree, current_depth)]
+    while stack:
+        path, branch, depth = stack.pop()
+        if max_depth != -1 and depth >= max_depth:
+            continue
+        with os.scandir(path) as it:
+            entries = sorted(it, key=lambda entry: (entry.is_file(), entry.name.lower()))
+        for entry in entries:
+            if entry.is_dir():
+                if entry.name in ignore_dirs:
+                    continue
+                sub_branch = branch.add(
+                    f"[bold magenta]:open_file_folder: [link file://{entry.path}]{escape(entry.name)}"
+                )
+                stack.append((entry.path, sub_branch, depth + 1))
+            else:
+                if entry.name in ignore_files:
+                    continue
+                text_filename = Text(entry.name, "green")
+                text_filename.highlight_regex(r"\..*$", "bold red")
+                text_filename.stylize(f"link file://{entry.path}")
+                icon = "🐍 " if os.path.splitext(entry.name)[1] == ".py" else "📄 "
+                branch.add(Text(icon) + text_filename)
+
+# Stands in for the root directory in cached trees, so one entry serves every clone of a commit
+_ROOT_PLACEHOLDER = "__REPO_ROOT__"
 
-    ignore_dirs = [".git", ".svn", "__pycache__"]
-    ignore_files = [".DS_Store", ".gitignore", ".gitattributes"]
-    paths = sorted(
-        pathlib.Path(directory).iterdir(),
-        key=lambda path: (path.is_file(), path.name.lower()),
-    )
-    for path in paths:
-        if path.is_dir():
-            if path.name in ignore_dirs:
-                continue
-            branch = tree.add(
-                f"[bold magenta]:open_file_folder: [link file://{path}]{escape(path.name)}"
-            )
-            walk_directory(path, branch, max_depth, current_depth + 1)
-        else:
-            if path.name in ignore_files:
-                continue
-            text_filename = Text(path.name, "green")
-            text_filename.highlight_regex(r"\..*$", "bold red")
-            text_filename.stylize(f"link file://{path}")
-            icon = "🐍 " if path.suffix == ".py" else "📄 "
-            tree.add(Text(icon) + text_filename)
 
-def view_repo_structure(directory: str, max_depth: int = -1) -> str:
+def _structure_cache_file(directory: str, max_depth: int, cache_dir: str | pathlib.Path) -> pathlib.Path | None:
+    """Cache entry for the directory's git HEAD, None if it is not a git repo or differs from HEAD."""
+    try:
+        head = subprocess.run(
+            ["git", "-C", str(directory), "rev-parse", "HEAD"],
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+        # ignored files are listed too, the tree shows them
+        status = subprocess.run(
+            ["git", "-C", str(directory), "status", "--porcelain", "--ignored"],
+            capture_output=True, text=True, check=True,
+        ).stdout
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    if not head or status.strip():
+        return None
+    return pathlib.Path(cache_dir) / f"structure-{head}-{max_depth}.txt"
+
+
+def view_repo_structure(directory: str, max_depth: int = -1, cache_dir: str | pathlib.Path | None = None) -> str:
     """
     Generate a string representation of the repository folder structure.
     
     Args:
         directory (str): Path to the directory to visualize
         max_depth (int): Maximum depth to traverse (-1 for unlimited)
+        cache_dir (str | pathlib.Path | None): Directory caching trees by git commit,
+            used only while the work tree is clean
         
     Returns:
         str: String representation of the directory tree structure
@@ -73,8 +104,12 @@ def view_repo_structure(directory: str, max_depth: int = -1) -> str:
     if not os.path.isdir(directory):
         raise ValueError(f"{directory} is not a valid directory.")
     
+    cache_file = _structure_cache_file(directory, max_depth, cache_dir) if cache_dir else None
+    if cache_file is not None and cache_file.exists():
+        return cache_file.read_text(encoding="utf-8").replace(_ROOT_PLACEHOLDER, str(directory), 1)
+    
     tree = Tree(
-        f":open_file_folder: [link file://{directory}]{directory}",
+        f":open_file_folder: [link file://{directory}]{_ROOT_PLACEHOLDER}",
         guide_style="bold bright_blue",
     )
     walk_directory(pathlib.Path(directory), tree, max_depth=max_depth)
@@ -82,4 +117,11 @@ def view_repo_structure(directory: str, max_depth: int = -1) -> str:
     console = Console(file=StringIO())
     console.print(tree)
     str_output = console.file.getvalue()
-    return str_output
+    if cache_file is not None:
+        cache_file.parent.mkdir(parents=True, exist_ok=True)
+        # write then rename, concurrent instances of the same commit may race on the entry
+        fd, tmp_path = tempfile.mkstemp(dir=cache_file.parent, suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(str_output)
+        os.replace(tmp_path, cache_file)
+    return str_output.replace(_ROOT_PLACEHOLDER, str(directory), 1)
@@ -1,4 +1,5 @@
 from abc import ABC, abstractmethod
+from functools import lru_cache
 from typing import Dict, List, Optional, Any
 
 from launch.core.runtime import available_platforms, BaseRuntime
@@ -651,6 +652,8 @@ LANGUAGE_HANDLERS: Dict[str, LanguageHandler] = {
 }
 
 
+# handlers are module-level singletons, so the resolved name can be cached
+@lru_cache(maxsize=None)
 def get_language_handler(language: str) -> LanguageHandler:
     normed_lang = language.strip().lower().replace("-", "").replace("_", "")
     if normed_lang in ["cs", "csharp"]:
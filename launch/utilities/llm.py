@@ -3,6 +3,7 @@ LLM provider abstraction backed by LiteLLM.
 """
 import logging
 import os
+import threading
 from functools import wraps
 from typing import Any, List, Literal
 
@@ -16,6 +17,9 @@ logger = logging.getLogger(__name__)
 litellm.suppress_debug_info = True
 litellm.turn_off_message_logging = True
 
+# Marker for messages whose content stays identical across ReAct steps, see LiteLLMModel._to_litellm_message
+PROMPT_CACHE_CONTROL: dict[str, str] = {"type": "ephemeral"}
+
 def update_accumulative_cost(
         d: dict[Literal["input_tokens", "output_tokens", "cost_usd"], int|float],
         response: BaseMessage) -> None:
@@ -45,9 +49,9 @@ def logged_invoke(invoke_func):
         Wrapped function that logs inputs and outputs
     """
     @wraps(invoke_func)
-    def wrapper(self, messages: List[BaseMessage]) -> BaseMessage:  
+    def wrapper(self, messages: List[BaseMessage], **kwargs) -> BaseMessage:  
         if self.log_folder is None:
-            response: BaseMessage = invoke_func(self, messages)
+            response: BaseMessage = invoke_func(self, messages, **kwargs)
             return response
         
         log_folder = self.log_folder  # Dynamically get the log folder from the instance
@@ -63,7 +67,7 @@ def logged_invoke(invoke_func):
             next_number = 0
         log_file_path = os.path.join(log_folder, f"{next_number}.md")
 
-        response: BaseMessage = invoke_func(self, messages)
+        response: BaseMessage = invoke_func(self, messages, **kwargs)
 
         with open(log_file_path, "w", encoding="utf-8") as f:
             f.write("##### LLM INPUT #####\n")
@@ -94,7 +98,7 @@ class LLMProvider:
         """
         self.log_folder = log_folder
         self.model_config = kwargs
-        self.llm_instance = LiteLLMModel(**kwargs)
+        self.llm_instance = LiteLLMModel.shared(**kwargs)
 
     @logged_invoke
     @retry(
@@ -102,28 +106,56 @@ class LLMProvider:
         wait=wait_exponential_jitter(initial=20, max=120, jitter=3),
         before_sleep=before_sleep_log(logger, logging.ERROR, exc_info=True)
     )
-    def invoke(self, messages: List[BaseMessage]) -> BaseMessage:
+    def invoke(self, messages: List[BaseMessage], max_tokens: int | None = None, stop: List[str] | None = None) -> BaseMessage:
         """
         Invoke the LLM with messages, includes automatic retry and logging.
         
         Args:
             messages (List[BaseMessage]): List of conversation messages
+            max_tokens (int | None): Cap on generated tokens for short classification style
+                answers, ignored for reasoning models and the responses endpoint
+            stop (List[str] | None): Sequences that end generation early (not included in the
+                output), ignored where the model or endpoint does not support them
             
         Returns:
-            BaseMessage: LLM response message
+            BaseMessage: LLM response message, response_metadata["finish_reason"] tells
+                whether generation stopped on its own ("stop") or was cut off
         """
-        return self.llm_instance.invoke(messages)
+        return self.llm_instance.invoke(messages, max_tokens=max_tokens, stop=stop)
 
 
 class LiteLLMModel:
     """LiteLLM model implementation."""
 
+    # Instances by completion arguments, see shared()
+    _shared: dict[str, "LiteLLMModel"] = {}
+    _shared_lock = threading.Lock()
+
+    @classmethod
+    def shared(cls, **kwargs) -> "LiteLLMModel":
+        """
+        Model for the given completion arguments, shared by all providers in the process.
+
+        Construction runs a pre-flight request and capability lookups, which only need
+        to happen once per configuration rather than once per instance. The model holds
+        no per-call state, so providers with different log folders can share it.
+        """
+        key = repr(sorted(kwargs.items()))
+        with cls._shared_lock:
+            model = cls._shared.get(key)
+            if model is None:
+                model = cls._shared[key] = cls(**kwargs)
+        return model
+
     def __init__(self, **kwargs):
         self.completion_args = kwargs
         
         # If your LLM Provider requires user identity login, put it here!
 
         self.endpoint: Literal["completion", "responses"] = self.pre_flight_check()
+        self.prompt_caching: bool = self.endpoint == "completion" and self._supports_prompt_caching()
+        self.reasoning: bool = self._supports_reasoning()
+        self.stop_sequences: bool = self.endpoint == "completion" and self._supports_stop()
 
     def pre_flight_check(self) -> Literal["completion", "responses"]:
         messages=[{"role":"user", "content":"hello!"}]
@@ -142,6 +174,29 @@ class LiteLLMModel:
                 return "responses"
             except:
                 raise
+
+    def _supports_reasoning(self) -> bool:
+        """Reasoning models spend output tokens before answering, so they must not be capped."""
+        if any(key in self.completion_args for key in ("thinking", "reasoning_effort")):
+            return True
+        try:
+            return litellm.utils.supports_reasoning(model=self.completion_args.get("model", ""))
+        except Exception:
+            return False
+
+    def _supports_stop(self) -> bool:
+        """Whether the model accepts ``stop`` sequences, several reasoning models reject them."""
+        try:
+            return "stop" in (litellm.get_supported_openai_params(model=self.completion_args.get("model", "")) or [])
+        except Exception:
+            return False
+
+    def _supports_prompt_caching(self) -> bool:
+        """Whether the model accepts ``cache_control`` markers on message content blocks."""
+        try:
+            return litellm.utils.supports_prompt_caching(model=self.completion_args.get("model", ""))
+        except Exception:
+            return False
     
     def _to_litellm_message(self, message: BaseMessage) -> dict[str, Any]:
         role = "user"
@@ -156,7 +211,13 @@ class LiteLLMModel:
         elif msg_type == "tool":
             role = "tool"
 
-        payload: dict[str, Any] = {"role": role, "content": message.content}
+        content = message.content
+        # Messages marked with additional_kwargs={"cache_control": {...}} become a cache breakpoint
+        cache_control = message.additional_kwargs.get("cache_control")
+        if cache_control and self.prompt_caching and isinstance(content, str):
+            content = [{"type": "text", "text": content, "cache_control": cache_control}]
+
+        payload: dict[str, Any] = {"role": role, "content": content}
         if name:
             payload["name"] = name
         if tool_call_id:
@@ -168,11 +229,15 @@ class LiteLLMModel:
                 payload["tool_calls"] = tool_calls
         return payload
     
-    def invoke(self, messages: List[BaseMessage]) -> AIMessage:
+    def invoke(self, messages: List[BaseMessage], max_tokens: int | None = None, stop: List[str] | None = None) -> AIMessage:
         payload = [self._to_litellm_message(message) for message in messages]
 
+        finish_reason = None
         if self.endpoint == "completion":
-            content, input_tokens, output_tokens, total_tokens, cost = self.invoke_completion(payload)
+            extra_args = {"max_tokens": max_tokens} if max_tokens and not self.reasoning else {}
+            if stop and self.stop_sequences:
+                extra_args["stop"] = stop
+            content, input_tokens, output_tokens, total_tokens, cost, finish_reason = self.invoke_completion(payload, **extra_args)
         elif self.endpoint == "responses":
             content, input_tokens, output_tokens, total_tokens, cost = self.invoke_responses(payload)
         else:
@@ -186,14 +251,16 @@ class LiteLLMModel:
                 "total_tokens": total_tokens,
                 "cost": cost,
             },
+            response_metadata={"finish_reason": finish_reason},
         )
     
-    def invoke_completion(self, messages: list[dict[str, Any]]) -> tuple[str, int, int, int, float]:
+    def invoke_completion(self, messages: list[dict[str, Any]], **extra_args) -> tuple[str, int, int, int, float, str | None]:
         response = litellm.completion(
             messages=messages, 
-            **self.completion_args
+            **{**self.completion_args, **extra_args}
         )
 
+        finish_reason = getattr(response.choices[0], "finish_reason", None)
         choice = response.choices[0].message
         content = choice.content if getattr(choice, "content", None) is not None else ""
         usage = getattr(response, "usage", None)
@@ -202,7 +269,7 @@ class LiteLLMModel:
         total_tokens = getattr(usage, "total_tokens", None) or 0
         cost = response._hidden_params.get("response_cost", None) or 0.0
 
-        return (content, input_tokens, output_tokens, total_tokens, cost)
+        return (content, input_tokens, output_tokens, total_tokens, cost, finish_reason)
     
     def invoke_responses(self, messages: list[dict[str, Any]]) -> tuple[str, int, int, int, float]:
         response = litellm.responses(
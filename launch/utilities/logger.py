@@ -1,7 +1,11 @@
 """
 Logging utilities for launch operations with file and console output.
 """
+import atexit
 import logging
+import queue
+import threading
+from logging.handlers import QueueHandler, QueueListener
 from pathlib import Path
 
 from rich.logging import RichHandler
@@ -10,9 +14,24 @@ import io, sys
 from rich.console import Console
 
 
+# Listeners of loggers not yet cleaned, stopped at exit so queued records still reach the files
+_active_listeners: set[QueueListener] = set()
+_listeners_lock = threading.Lock()
+
+
+@atexit.register
+def _stop_active_listeners() -> None:
+    with _listeners_lock:
+        listeners = list(_active_listeners)
+        _active_listeners.clear()
+    for listener in listeners:
+        listener.stop()
+
+
 def setup_logger(instance_id: str, log_file: Path | list[Path], printing: bool = True) -> logging.Logger:
     """
     Setup logger with file and optional console output for an instance.
+    Records are handed to a background thread, agents do not wait for file or console I/O.
     
     Args:
         instance_id (str): Unique identifier for the logger instance
@@ -30,13 +49,14 @@ def setup_logger(instance_id: str, log_file: Path | list[Path], printing: bool =
     log_files = [log_file] if isinstance(log_file, Path) else log_file
     
     # Create file handlers for all log file paths
+    handlers: list[logging.Handler] = []
     formatter = logging.Formatter("%(asctime)s - %(message)s")
     for lf in log_files:
         lf.parent.mkdir(parents=True, exist_ok=True)
         fh = logging.FileHandler(lf, encoding="utf-8")
         fh.setLevel(logging.INFO)
         fh.setFormatter(formatter)
-        logger.addHandler(fh)
+        handlers.append(fh)
     # add console handler
     # ch = logging.StreamHandler()
     # ch.setLevel(logging.INFO)
@@ -48,7 +68,16 @@ def setup_logger(instance_id: str, log_file: Path | list[Path], printing: bool =
         console = Console(file=utf8_stdout, soft_wrap=True)
         rh = RichHandler(console=console, rich_tracebacks=True, show_path=False)
         rh.setLevel(logging.INFO)
-        logger.addHandler(rh)
+        handlers.append(rh)
+
+    record_queue = queue.SimpleQueue()
+    listener = QueueListener(record_queue, *handlers, respect_handler_level=True)
+    queue_handler = QueueHandler(record_queue)
+    queue_handler.listener = listener
+    logger.addHandler(queue_handler)
+    with _listeners_lock:
+        _active_listeners.add(listener)
+    listener.start()
     return logger
 
 
@@ -63,4 +92,14 @@ def clean_logger(logger: logging.Logger | str) -> None:
         logger = logging.getLogger(logger)
     for handler in logger.handlers[:]:
         logger.removeHandler(handler)
+        listener = getattr(handler, "listener", None)
+        if listener is not None:
+            with _listeners_lock:
+                active = listener in _active_listeners
+                _active_listeners.discard(listener)
+            if active:
+                # writes out the queued records
+                listener.stop()
+            for queued_handler in listener.handlers:
+                queued_handler.close()
         handler.close()
@@ -1,13 +1,14 @@
 """
 Utility functions for workspace and repository management.
 """
-import json
 import logging
 from dataclasses import dataclass
 import os
 from pathlib import Path
+import shutil
 import threading
 
+from launch.utilities import fastjson
 from launch.utilities.config import Config
 from launch.utilities.get_repo_structure import view_repo_structure
 from launch.utilities.llm import LLMProvider
@@ -29,6 +30,8 @@ class WorkSpace:
         llm_log_folder (Path): Directory for LLM interaction logs
         date (str): Creation date of the instance (optional)
         language (str): Programming language of the repository
+        overwrite (bool): Whether results of earlier runs are ignored
+        test_setup_cache_dir (Path | None): Directory of cached test setups, None disables the cache
     """
     instance_id: str
     repo_root: Path
@@ -48,6 +51,8 @@ class WorkSpace:
     get_pertest_cmd: bool = True
     timeout: int = 30
     image_prefix: str = "repolaunch/dev"
+    overwrite: bool = False
+    test_setup_cache_dir: Path | None = None
     
     def cleanup(self) -> None:
         """Clean up workspace resources."""
@@ -57,12 +62,67 @@ class WorkSpace:
             print(f"Failed to clean logger: {e}")
 
 
-def prepare_repo(instance: dict, repo_root: Path) -> Path:
+# Opened once for the whole process, subprocess.DEVNULL opens /dev/null again for every git call
+_DEVNULL = os.open(os.devnull, os.O_RDWR)
+
+
+def _git(*args: str, cwd: Path | None = None) -> None:
+    subprocess.run(
+        # protocol v2 advertises only the refs asked for, not every branch and tag of the remote
+        ["git", "-c", "protocol.version=2", *args],
+        cwd=str(cwd) if cwd is not None else None,
+        check=True,
+        stdout=_DEVNULL,
+        stderr=_DEVNULL,
+        # never wait for credentials on a missing or private repo, fail instead
+        env={**os.environ, "GIT_TERMINAL_PROMPT": "0"},
+    )
+
+
+# One lock per cached bare repo, instances of the same repo run in parallel threads
+_git_cache_locks: dict[str, threading.Lock] = {}
+_git_cache_locks_guard = threading.Lock()
+
+
+def _cached_bare_repo(url: str, repo: str, base_commit: str, cache_root: Path) -> Path:
+    """
+    Bare clone of the repo under cache_root that contains base_commit, created or fetched as needed.
+    """
+    bare_repo = cache_root / f"{repo.replace('/', '__')}.git"
+    with _git_cache_locks_guard:
+        lock = _git_cache_locks.setdefault(str(bare_repo), threading.Lock())
+    with lock:
+        if not bare_repo.exists():
+            cache_root.mkdir(parents=True, exist_ok=True)
+            try:
+                _git("clone", "--bare", url, str(bare_repo))
+            except subprocess.CalledProcessError:
+                shutil.rmtree(bare_repo, ignore_errors=True)
+                raise
+        has_commit = subprocess.run(
+            ["git", "cat-file", "-e", f"{base_commit}^{{commit}}"],
+            cwd=str(bare_repo),
+            stdout=_DEVNULL,
+            stderr=_DEVNULL,
+        ).returncode == 0
+        if not has_commit:
+            try:
+                _git("fetch", "origin", base_commit, cwd=bare_repo)
+            except subprocess.CalledProcessError:
+                _git("fetch", "origin", cwd=bare_repo)
+    return bare_repo
+
+
+def prepare_repo(instance: dict, repo_root: Path, cache_root: Path | None = None) -> Path:
     """
     Prepares the repository by cloning it from GitHub and checking out the specified commit.
     Args:
         instance (dict): The instance containing repository information.
         repo_root (Path): The root directory where the repository will be cloned.
+        cache_root (Path | None): Directory of shared bare repos. When given, the clone is a local
+            one borrowing objects from the bare repo of instance["repo"] (git clone --shared),
+            so repeated instances of a repo need no network beyond missing commits.
+            The clone depends on the bare repo and must not be moved to another machine.
     """
     url = f'https://github.com/{instance["repo"]}'
     base_commit = instance["base_commit"]
@@ -70,36 +130,29 @@ def prepare_repo(instance: dict, repo_root: Path) -> Path:
     if repo_root.exists():
         return repo_root
 
+    if cache_root is not None:
+        try:
+            bare_repo = _cached_bare_repo(url, instance["repo"], base_commit, cache_root)
+            _git("clone", "--shared", "--no-checkout", str(bare_repo), str(repo_root))
+            _git("remote", "set-url", "origin", url, cwd=repo_root)
+            _git("reset", "--hard", base_commit, cwd=repo_root)
+            return repo_root
+        except subprocess.CalledProcessError:
+            # fall back to fetching the commit directly
+            shutil.rmtree(repo_root, ignore_errors=True)
+
     # Clone repo using subprocess
-    subprocess.run(
-        ["git", "init", str(repo_root)],
-        check=True,
-        stdout=subprocess.DEVNULL,
-        stderr=subprocess.DEVNULL
-    )
-    subprocess.run(
-        ["git", "remote", "add", "origin", url],
-        cwd=str(repo_root),
-        check=True,
-        stdout=subprocess.DEVNULL,
-        stderr=subprocess.DEVNULL
-    )
-    subprocess.run(
-        ["git", "fetch", "--depth", "1", "origin", base_commit],
-        cwd=str(repo_root),
-        check=True,
-        stdout=subprocess.DEVNULL,
-        stderr=subprocess.DEVNULL
-    )
+    _git("init", str(repo_root))
+    _git("remote", "add", "origin", url, cwd=repo_root)
+    # Only the base commit is needed, so no history is downloaded.
+    # Servers that refuse fetching a bare sha get a full fetch instead.
+    try:
+        _git("fetch", "--depth", "1", "origin", base_commit, cwd=repo_root)
+    except subprocess.CalledProcessError:
+        _git("fetch", "origin", cwd=repo_root)
 
     # Reset to base_commit using subprocess
-    subprocess.run(
-        ["git", "reset", "--hard", base_commit],
-        cwd=str(repo_root),
-        check=True,
-        stdout=subprocess.DEVNULL,
-        stderr=subprocess.DEVNULL
-    )
+    _git("reset", "--hard", base_commit, cwd=repo_root)
 
     return repo_root
 
@@ -107,15 +160,13 @@ def prepare_repo(instance: dict, repo_root: Path) -> Path:
 def check_workspace_exists(workspace_root: Path, instance: dict) -> bool:
     """Check if the workspace for the given instance already exists."""
     instance_folder = workspace_root / instance["instance_id"]
-    result_path = instance_folder / "result.json"
-    instance_path = instance_folder / "instance.json"
-    if (
-        (not instance_folder.exists())
-        or (not result_path.exists())
-        or (not instance_path.exists())
-    ):
+    # one directory listing instead of a stat per path
+    try:
+        with os.scandir(instance_folder) as entries:
+            names = {entry.name for entry in entries}
+    except (FileNotFoundError, NotADirectoryError):
         return False
-    return True
+    return "result.json" in names and "instance.json" in names
 
 
 def prepare_workspace(
@@ -134,29 +185,33 @@ def prepare_workspace(
         WorkSpace: Fully configured workspace ready for processing
     """
     instance_folder = workspace_root / "playground" / instance["instance_id"]
-    instance_folder.mkdir(parents=True, exist_ok=True)
     result_path = instance_folder / "result.json"
     instance_path = instance_folder / "instance.json"
     llm_log_folder = instance_folder / "llm"
+    # also creates instance_folder
     llm_log_folder.mkdir(parents=True, exist_ok=True)
     llm = LLMProvider(
         log_folder=llm_log_folder,
         **config.model_config,
     )
-    with open(instance_path, "w") as f:
-        json.dump(instance, f, indent=2)
+    instance_json = fastjson.dumps(instance, indent=True)
+    # a rerun of an existing workspace leaves an unchanged instance.json alone
+    try:
+        unchanged = instance_path.read_text(encoding="utf-8") == instance_json
+    except FileNotFoundError:
+        unchanged = False
+    if not unchanged:
+        instance_path.write_text(instance_json, encoding="utf-8")
     
-    repo_structure = None
-    if os.path.exists(result_path):
-        with open(result_path) as f:
-            history = f.read()
-        if history.strip():
-            history = json.loads(history)
-            repo_structure = history.get("repo_structure", None)
-
-    repo_root = prepare_repo(instance, instance_folder / "repo")
+    repo_structure = load_repo_structure(result_path).get("repo_structure", None)
+
+    repo_root = prepare_repo(
+        instance,
+        instance_folder / "repo",
+        cache_root=workspace_root / ".cache" / "git" if config.git_cache else None,
+    )
     if not repo_structure:
-        repo_structure = view_repo_structure(repo_root)
+        repo_structure = view_repo_structure(repo_root, cache_dir=workspace_root / ".cache" / "structure")
     
     # Convert log_file to list of Paths
     log_files = [log_file] if isinstance(log_file, str) else log_file
@@ -192,11 +247,63 @@ def prepare_workspace(
         max_steps_verify=config.max_steps_verify,
         max_steps_organize=config.max_steps_organize,
         get_pertest_cmd=config.mode.get("get_pertest_cmd", True),
-        timeout=config.timeout
+        timeout=config.timeout,
+        overwrite=config.overwrite,
+        test_setup_cache_dir=workspace_root / ".cache" / "verify" if config.test_setup_cache else None,
     )
 
 
 
+# Static repo metadata written next to result.json, so result.json stays small
+STRUCTURE_FILE = "structure.json"
+
+
+def save_repo_structure(result_path: str | Path, repo_structure: str | None, docs: str | None, overwrite: bool = True) -> str:
+    """
+    Save repo_structure and docs of an instance into the structure file beside result.json.
+    
+    Args:
+        result_path (str | Path): Path of the instance's result.json
+        repo_structure (str | None): String representation of repository structure
+        docs (str | None): Content of the related files located by the agent
+        overwrite (bool): Rewrite the file if it already exists
+        
+    Returns:
+        str: File name of the structure file, relative to the instance folder
+    """
+    structure_path = os.path.join(os.path.dirname(result_path), STRUCTURE_FILE)
+    if overwrite or not os.path.exists(structure_path):
+        with open(structure_path, "w", encoding="utf-8") as f:
+            f.write(fastjson.dumps({"repo_structure": repo_structure, "docs": docs}))
+    return STRUCTURE_FILE
+
+
+def load_repo_structure(result_path: str | Path) -> dict:
+    """
+    Load repo_structure and docs of an instance, falling back to result.json written by older versions.
+    
+    Args:
+        result_path (str | Path): Path of the instance's result.json
+        
+    Returns:
+        dict: With optional keys repo_structure and docs
+    """
+    structure_path = os.path.join(os.path.dirname(result_path), STRUCTURE_FILE)
+    for path in (structure_path, result_path):
+        try:
+            # bytes go straight to the json parser, without a separate decode
+            with open(path, "rb") as f:
+                content = f.read()
+        except FileNotFoundError:
+            continue
+        if not content.strip():
+            continue
+        data = fastjson.loads(content)
+        if "repo_structure" in data or "docs" in data:
+            return {"repo_structure": data.get("repo_structure"), "docs": data.get("docs")}
+    return {}
+
+
 def safe_read_result(result: str, result_path: Path, lock: threading.Lock) -> dict:
     '''
     Though this function looks ugly,
@@ -204,18 +311,20 @@ def safe_read_result(result: str, result_path: Path, lock: threading.Lock) -> di
     Because due to some minor bugs in Python thread concurrency,
     result.json is not saved in the 'save' step successfully sometimes.
     '''
+    # one critical section: no other thread can write between the check and the fallback write
     with lock:
-        if result_path.exists():
-            saved_result = result_path.read_text()
-            if saved_result.strip():
-                return json.loads(saved_result)
-    if not result.strip():
-        return {
-            "completed": False, 
-            "organize_completed": False, 
-            "exception": "Result Empty Error!"
-        }
-    with lock:
-        with open(result_path, "w") as f:
+        try:
+            saved_result = result_path.read_bytes()
+        except FileNotFoundError:
+            saved_result = b""
+        if saved_result.strip():
+            return fastjson.loads(saved_result)
+        if not result.strip():
+            return {
+                "completed": False, 
+                "organize_completed": False, 
+                "exception": "Result Empty Error!"
+            }
+        with open(result_path, "w", encoding="utf-8") as f:
             f.write(result)
-    return json.loads(result)
+    return fastjson.loads(result)
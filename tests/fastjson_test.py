@@ -0,0 +1,59 @@
+import json
+
+import pytest
+
+from launch.utilities import fastjson
+
+
+RESULT = {
+    "instance_id": "owner__repo-1",
+    "success": True,
+    "exception": None,
+    "duration": 12,
+    "cost": {"input_tokens": 1024, "cost_usd": 0.5},
+    "test_status": {"tests/test_ünïcode.py::test_一": "pass", "test \"quoted\"\n": "fail"},
+    "rebuild_commands": ["pip install -e .", "echo $HOME"],
+    "empty": [[], {}],
+}
+NON_STR_KEYS = {1: "a", 2.5: "b", None: "c"}
+
+
+@pytest.fixture(params=["orjson", "stdlib"])
+def backend(request, monkeypatch):
+    if request.param == "orjson":
+        pytest.importorskip("orjson")
+    else:
+        monkeypatch.setattr(fastjson, "orjson", None)
+    return request.param
+
+
+@pytest.mark.parametrize("indent", [False, True])
+def test_dumps_matches_stdlib_json(backend, indent):
+    text = fastjson.dumps(RESULT, indent=indent)
+
+    assert json.loads(text) == RESULT
+    if indent:
+        assert text == json.dumps(RESULT, indent=2, ensure_ascii=False)
+    else:
+        assert text == json.dumps(RESULT, separators=(",", ":"), ensure_ascii=False)
+
+
+def test_dumps_handles_integers_beyond_64_bit(backend):
+    assert fastjson.dumps({"big": 2 ** 70}) == '{"big":1180591620717411303424}'
+
+
+def test_dumps_converts_non_str_keys_like_stdlib(backend):
+    assert json.loads(fastjson.dumps(NON_STR_KEYS)) == json.loads(json.dumps(NON_STR_KEYS))
+
+
+@pytest.mark.parametrize("data", [json.dumps(RESULT), json.dumps(RESULT).encode()])
+def test_loads_matches_stdlib_json(backend, data):
+    assert fastjson.loads(data) == json.loads(data)
+
+
+def test_backends_produce_same_text(monkeypatch):
+    pytest.importorskip("orjson")
+    with_orjson = [fastjson.dumps(RESULT), fastjson.dumps(RESULT, indent=True)]
+    monkeypatch.setattr(fastjson, "orjson", None)
+
+    assert [fastjson.dumps(RESULT), fastjson.dumps(RESULT, indent=True)] == with_orjson
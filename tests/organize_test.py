@@ -0,0 +1,300 @@
+import json
+import logging
+import os
+import time
+from collections import OrderedDict
+from types import SimpleNamespace
+
+import pytest
+
+from launch.agent.organize import rebuild, testall
+from launch.agent.organize.rebuild import known_rebuild_commands, verify_rebuild_commands
+from launch.agent.organize.testall import load_cached_test_setup, organize_test_cmd, save_cached_test_setup
+
+
+def organize_state(tmp_path, instance=None, result=None, overwrite=False):
+    result_path = tmp_path / "result.json"
+    if result is not None:
+        result_path.write_text(json.dumps(result))
+    return {
+        "instance": instance or {"instance_id": "owner__repo-1"},
+        "result_path": str(result_path),
+        "overwrite": overwrite,
+    }
+
+
+def test_known_rebuild_commands_reads_previous_result(tmp_path):
+    state = organize_state(tmp_path, result={"rebuild_commands": ["make", "make install"]})
+
+    assert known_rebuild_commands(state) == "make;make install"
+
+
+def test_known_rebuild_commands_prefers_instance_commands(tmp_path):
+    state = organize_state(
+        tmp_path,
+        instance={"instance_id": "owner__repo-1", "rebuild_cmds": ["cmake --build ."]},
+        result={"rebuild_commands": ["make"]},
+    )
+
+    assert known_rebuild_commands(state) == "cmake --build ."
+
+
+def test_known_rebuild_commands_without_previous_run(tmp_path):
+    assert known_rebuild_commands(organize_state(tmp_path)) is None
+
+
+def test_known_rebuild_commands_ignored_on_overwrite(tmp_path):
+    state = organize_state(
+        tmp_path,
+        instance={"instance_id": "owner__repo-1", "rebuild_cmds": ["cmake --build ."]},
+        result={"rebuild_commands": ["make"]},
+        overwrite=True,
+    )
+
+    assert known_rebuild_commands(state) is None
+
+
+class FakeResult:
+    def __init__(self, output):
+        self.output = output
+
+    def to_observation(self):
+        return self.output
+
+
+class FakeSession:
+    def __init__(self, output):
+        self.output = output
+        self.commands = []
+
+    def send_command(self, command, timeout=None):
+        self.commands.append(command)
+        return FakeResult(self.output)
+
+
+class ConversationStarted(Exception):
+    pass
+
+
+class FailingLLM:
+    def invoke(self, messages, **kwargs):
+        raise ConversationStarted("the organize-test conversation started")
+
+
+STATUS_PARSER = "def parser(log):\n    return {name: 'pass' for name in log.split()}\n"
+
+
+@pytest.fixture
+def setup_cache_dir(tmp_path):
+    return tmp_path / ".cache" / "verify"
+
+
+def organize_test_state(cache_dir, output="", overwrite=False):
+    return {
+        "instance": {"repo": "owner/repo", "base_commit": "abc123"},
+        "language": "python",
+        "platform": "linux",
+        "setup_commands": ["pip install -e ."],
+        "overwrite": overwrite,
+        "test_setup_cache_dir": str(cache_dir) if cache_dir else None,
+        "exception": None,
+        "llm": FailingLLM(),
+        "cost": {"organize": {"input_tokens": 0, "output_tokens": 0, "cost_usd": 0.0}},
+        "logger": logging.getLogger("organize_test"),
+        "session": FakeSession(output),
+        "repo_structure": "",
+        "docs": "",
+        "commands": [],
+    }
+
+
+def test_cached_test_setup_roundtrip(setup_cache_dir):
+    state = organize_test_state(setup_cache_dir)
+    save_cached_test_setup(state, "pytest > out.log", "cat out.log", STATUS_PARSER)
+
+    assert load_cached_test_setup(state) == {
+        "test_command": "pytest > out.log",
+        "print_command": "cat out.log",
+        "parser": STATUS_PARSER,
+    }
+    assert load_cached_test_setup({**state, "setup_commands": ["make"]}) is None
+
+
+def test_cached_test_setup_disabled_without_cache_dir(setup_cache_dir):
+    disabled = organize_test_state(None)
+    save_cached_test_setup(disabled, "pytest > out.log", "cat out.log", STATUS_PARSER)
+    save_cached_test_setup(organize_test_state(setup_cache_dir), "pytest > out.log", "cat out.log", STATUS_PARSER)
+
+    assert load_cached_test_setup(disabled) is None
+    assert len(list(setup_cache_dir.iterdir())) == 1
+
+
+def test_cached_test_setup_expires(setup_cache_dir):
+    state = organize_test_state(setup_cache_dir)
+    save_cached_test_setup(state, "pytest > out.log", "cat out.log", STATUS_PARSER)
+    (cache_file,) = setup_cache_dir.iterdir()
+    expired = time.time() - testall.TEST_SETUP_CACHE_TTL - 60
+    os.utime(cache_file, (expired, expired))
+
+    assert load_cached_test_setup(state) is None
+
+
+def test_cached_test_setup_ignored_on_overwrite(setup_cache_dir):
+    save_cached_test_setup(organize_test_state(setup_cache_dir), "pytest > out.log", "cat out.log", STATUS_PARSER)
+
+    assert load_cached_test_setup(organize_test_state(setup_cache_dir, overwrite=True)) is None
+
+
+def test_organize_test_cmd_reuses_cached_test_setup(setup_cache_dir):
+    state = organize_test_state(setup_cache_dir, output="test_a test_b")
+    save_cached_test_setup(state, "pytest > out.log", "cat out.log", STATUS_PARSER)
+
+    result = organize_test_cmd(state, max_steps=1)
+
+    assert result["success"] is True
+    assert result["test_status"] == {"test_a": "pass", "test_b": "pass"}
+    assert state["session"].commands == ["pytest > out.log", "cat out.log"]
+
+
+@pytest.mark.parametrize(
+    "cached_parser",
+    [
+        pytest.param("def parser(log):\n    return {}\n", id="no-statuses"),
+        pytest.param("def parser(log):\n    return {name: 'fail' for name in log.split()}\n", id="all-failing"),
+    ],
+)
+def test_organize_test_cmd_falls_back_to_conversation(setup_cache_dir, cached_parser):
+    state = organize_test_state(setup_cache_dir, output="test_a test_b")
+    save_cached_test_setup(state, "pytest > out.log", "cat out.log", cached_parser)
+
+    result = organize_test_cmd(state, max_steps=1)
+
+    assert result["success"] is False
+    assert "the organize-test conversation started" in str(result["exception"])
+    assert state["session"].commands == ["pytest > out.log", "cat out.log"]
+
+
+class RebuildResult(FakeResult):
+    def __init__(self, output, exit_code):
+        super().__init__(output)
+        self.metadata = SimpleNamespace(exit_code=exit_code)
+
+
+class RebuildSession(FakeSession):
+    def __init__(self, output, exit_code):
+        super().__init__(output)
+        self.exit_code = exit_code
+
+    def send_command(self, command, timeout=None):
+        self.commands.append(command)
+        return RebuildResult(self.output, self.exit_code)
+
+
+class VerdictLLM:
+    """Answers with verdict, or with the (content, finish_reason) pairs of answers in turn."""
+
+    def __init__(self, verdict="SUCCESS", answers=None):
+        self.answers = list(answers) if answers is not None else None
+        self.verdict = verdict
+        self.calls = 0
+        self.max_tokens = []
+
+    def invoke(self, messages, max_tokens=None, **kwargs):
+        self.calls += 1
+        self.max_tokens.append(max_tokens)
+        content, finish_reason = self.answers.pop(0) if self.answers is not None else (self.verdict, "stop")
+        return SimpleNamespace(
+            content=content,
+            usage_metadata={"input_tokens": 10, "output_tokens": 1, "cost": 0.001},
+            response_metadata={"finish_reason": finish_reason},
+        )
+
+
+@pytest.fixture
+def verification_cache(monkeypatch):
+    cache = OrderedDict()
+    monkeypatch.setattr(rebuild, "_verification_cache", cache)
+    return cache
+
+
+def rebuild_state(output, exit_code, verdict="SUCCESS"):
+    return {
+        "llm": VerdictLLM(verdict),
+        "cost": {"organize": {"input_tokens": 0, "output_tokens": 0, "cost_usd": 0.0}},
+        "logger": logging.getLogger("organize_test"),
+        "session": RebuildSession(output, exit_code),
+    }
+
+
+def test_verify_rebuild_commands_skips_llm_on_obvious_success(verification_cache):
+    state = rebuild_state("Successfully installed repo-1.0", 0)
+
+    assert verify_rebuild_commands(state, "pip install -e .")[0] is True
+    assert state["llm"].calls == 0
+
+
+def test_verify_rebuild_commands_asks_llm_when_output_mentions_errors(verification_cache):
+    state = rebuild_state("Error: optional plugin missing, build done", 0, verdict="SUCCESS")
+
+    assert verify_rebuild_commands(state, "make")[0] is True
+    assert state["llm"].calls == 1
+
+
+def test_verify_rebuild_commands_reuses_verdict_for_identical_run(verification_cache):
+    first = rebuild_state("npm ERR! missing script: build", 1, verdict="FAILURE")
+    second = rebuild_state("npm ERR! missing script: build", 1, verdict="SUCCESS")
+
+    assert verify_rebuild_commands(first, "npm run build")[0] is False
+    assert verify_rebuild_commands(second, "npm run build")[0] is False
+    assert (first["llm"].calls, second["llm"].calls) == (1, 0)
+
+
+def test_verify_rebuild_commands_asks_again_for_different_output(verification_cache):
+    first = rebuild_state("npm ERR! missing script: build", 1, verdict="FAILURE")
+    second = rebuild_state("npm ERR! network timeout", 1, verdict="FAILURE")
+
+    verify_rebuild_commands(first, "npm run build")
+    verify_rebuild_commands(second, "npm run build")
+
+    assert (first["llm"].calls, second["llm"].calls) == (1, 1)
+
+
+def test_verification_cache_is_bounded(verification_cache, monkeypatch):
+    monkeypatch.setattr(rebuild, "VERIFICATION_CACHE_SIZE", 2)
+    for i in range(3):
+        verify_rebuild_commands(rebuild_state(f"error {i}", 1, verdict="FAILURE"), "make")
+
+    assert len(verification_cache) == 2
+    state = rebuild_state("error 0", 1, verdict="FAILURE")
+    verify_rebuild_commands(state, "make")
+    assert state["llm"].calls == 1
+
+
+@pytest.mark.parametrize("answer", ["", "The build", "  \n"])
+def test_verify_rebuild_commands_does_not_cache_answers_without_verdict(verification_cache, answer):
+    first = rebuild_state("npm ERR! missing script: build", 1, verdict=answer)
+    second = rebuild_state("npm ERR! missing script: build", 1, verdict="SUCCESS")
+
+    assert verify_rebuild_commands(first, "npm run build")[0] is False
+    assert verify_rebuild_commands(second, "npm run build")[0] is True
+    assert (first["llm"].calls, second["llm"].calls) == (1, 1)
+    assert len(verification_cache) == 1
+
+
+def test_verify_rebuild_commands_retries_uncapped_when_answer_is_cut_off(verification_cache):
+    state = rebuild_state("npm ERR! missing script: build", 1)
+    state["llm"] = VerdictLLM(answers=[("", "length"), ("FAILURE", "stop")])
+
+    assert verify_rebuild_commands(state, "npm run build")[0] is False
+    assert state["llm"].max_tokens == [rebuild.VERIFICATION_MAX_TOKENS, None]
+    assert state["cost"]["organize"]["input_tokens"] == 20
+    assert len(verification_cache) == 1
+
+
+def test_verify_rebuild_commands_does_not_retry_complete_answer_without_verdict(verification_cache):
+    state = rebuild_state("npm ERR! missing script: build", 1)
+    state["llm"] = VerdictLLM(answers=[("I cannot tell", "stop")])
+
+    assert verify_rebuild_commands(state, "npm run build")[0] is False
+    assert state["llm"].calls == 1
+    assert len(verification_cache) == 0
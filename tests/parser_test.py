@@ -0,0 +1,248 @@
+import pickle
+import threading
+from collections import OrderedDict
+from types import SimpleNamespace
+
+import pytest
+
+from launch.scripts import parser as parser_module
+from launch.scripts.parser import _compile_parser, _compile_script, digest, run_parser_cached, run_parser_with_timeout
+
+
+PASSING_PARSER = "def parser(log):\n    return {name: 'pass' for name in log.split()}\n"
+SLEEPING_PARSER = "import time\n\ndef parser(log):\n    time.sleep(60)\n"
+
+
+def test_run_parser_with_timeout_returns_parser_result():
+    assert run_parser_with_timeout(PASSING_PARSER, "a b") == {"a": "pass", "b": "pass"}
+
+
+def test_run_parser_with_timeout_raises_on_runaway_parser():
+    with pytest.raises(TimeoutError):
+        run_parser_with_timeout(SLEEPING_PARSER, "a", timeout=1)
+
+
+def test_slow_parser_does_not_time_out_concurrent_parsers():
+    results = {}
+
+    def run(name, script):
+        try:
+            results[name] = run_parser_with_timeout(script, "a", timeout=3)
+        except TimeoutError:
+            results[name] = "timeout"
+
+    threads = [threading.Thread(target=run, args=("slow", SLEEPING_PARSER))]
+    threads += [threading.Thread(target=run, args=(f"ok{i}", PASSING_PARSER)) for i in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert results.pop("slow") == "timeout"
+    assert results == {f"ok{i}": {"a": "pass"} for i in range(4)}
+
+
+def test_run_parser_with_timeout_reports_dead_worker_as_error_string():
+    result = run_parser_with_timeout("import os\n\ndef parser(log):\n    os._exit(3)\n", "a")
+
+    assert isinstance(result, str)
+    assert "exit code 3" in result
+
+
+def test_run_parser_with_timeout_reports_unserializable_result_as_error_string():
+    result = run_parser_with_timeout("def parser(log):\n    return {'a': lambda: 'pass'}\n", "a")
+
+    assert isinstance(result, str)
+    assert "Parser process failed" in result
+
+
+def test_run_parser_with_timeout_rejects_result_of_wrong_shape():
+    result = run_parser_with_timeout("def parser(log):\n    return {'a': 1}\n", "a")
+
+    assert isinstance(result, str)
+    assert "Parser process failed" in result
+
+
+def test_run_parser_with_timeout_treats_forged_stdout_as_data():
+    pickled = pickle.dumps(SimpleNamespace(a="pass"))
+    script = (
+        "import os\n\n"
+        "def parser(log):\n"
+        f"    os.write(1, {pickled!r})\n"
+        "    os._exit(0)\n"
+    )
+    result = run_parser_with_timeout(script, "a")
+
+    assert isinstance(result, str)
+    assert "Parser process failed" in result
+
+
+def test_run_parser_with_timeout_ignores_forged_json_of_wrong_shape():
+    script = "import os\n\ndef parser(log):\n    os.write(1, b'[1, 2]')\n    os._exit(0)\n"
+
+    assert "Parser process failed" in run_parser_with_timeout(script, "a")
+
+
+LOG = "\n".join([
+    "tests/test_a.py::test_one PASSED",
+    "tests/test_a.py::test_two FAILED",
+    "tests/test_b.py::test_three SKIPPED",
+    "ERROR collecting tests/test_c.py",
+])
+
+
+def run_compiled(code, log=LOG):
+    namespace = {}
+    exec(code, namespace)
+    return namespace["parser"](log), namespace
+
+
+def assert_hoisting(script, hoisted):
+    expected, _ = run_compiled(_compile_script(script))
+    result, namespace = run_compiled(_compile_parser(script))
+
+    assert result == expected
+    assert any(name.startswith("_repolaunch_pattern_") for name in namespace) is hoisted
+
+
+def test_hoisting_literal_patterns_keeps_output():
+    script = '''"""Parse pytest output."""
+from __future__ import annotations
+import re
+
+def parser(log):
+    status = {}
+    for line in log.splitlines():
+        m = re.match(r"(\\S+) (PASSED|FAILED|SKIPPED)$", line)
+        if m:
+            status[m.group(1)] = m.group(2).lower()
+        elif re.search(r"^ERROR", line):
+            status[re.sub(r"^ERROR collecting ", "", line)] = "fail"
+    status["parts"] = len(re.split(r"::", log))
+    return status
+'''
+    assert_hoisting(script, hoisted=True)
+
+
+def test_hoisting_skips_shadowed_re():
+    script = '''import re
+
+class Matcher:
+    @staticmethod
+    def search(pattern, line):
+        return pattern in line
+
+def parser(log, re=Matcher):
+    return {line: "pass" for line in log.splitlines() if re.search("PASSED", line)}
+'''
+    assert_hoisting(script, hoisted=False)
+
+
+def test_hoisting_skips_rebound_re():
+    script = '''import re
+import string as re
+
+def parser(log):
+    return {"letters": re.ascii_lowercase[:3]}
+'''
+    assert_hoisting(script, hoisted=False)
+
+
+def test_hoisting_skips_from_re_import():
+    script = '''from re import search
+
+def parser(log):
+    return {line: "pass" for line in log.splitlines() if search(r"PASSED$", line)}
+'''
+    assert_hoisting(script, hoisted=False)
+
+
+def test_hoisting_skips_non_literal_flags_and_patterns():
+    script = '''import re
+
+PATTERNS = {"pass": "PASSED", "fail": "FAILED"}
+FLAGS = re.IGNORECASE
+
+def parser(log):
+    status = {}
+    for line in log.splitlines():
+        for name, pattern in PATTERNS.items():
+            if re.search(pattern + "$", line, FLAGS):
+                status[line.split()[0]] = name
+        if re.search(f"{'SKIPPED'}$", line):
+            status[line.split()[0]] = "skip"
+        if re.sub(r"ed$", "", line, flags=re.I) != line:
+            status.setdefault(line.split()[0], "other")
+    return status
+'''
+    assert_hoisting(script, hoisted=False)
+
+
+def test_hoisting_keeps_invalid_pattern_lazy():
+    script = '''import re
+
+def unused(line):
+    return re.search("(", line)
+
+def parser(log):
+    return {line: "pass" for line in log.splitlines() if re.search("PASSED", line)}
+'''
+    assert_hoisting(script, hoisted=True)
+
+
+def test_run_parser_cached_reuses_result_of_same_script_and_log():
+    calls = []
+
+    def runner(script, log):
+        calls.append((script, log))
+        return {"a": "pass"}
+
+    first = run_parser_cached("cached parser 1", "log 1", runner=runner)
+    first["a"] = "fail"
+    second = run_parser_cached("cached parser 1", "log 1", log_digest=digest("log 1"), runner=runner)
+
+    assert second == {"a": "pass"}
+    assert calls == [("cached parser 1", "log 1")]
+
+
+def test_run_parser_cached_runs_again_for_other_script_or_log():
+    calls = []
+
+    def runner(script, log):
+        calls.append((script, log))
+        return {}
+
+    run_parser_cached("cached parser 2", "log 2", runner=runner)
+    run_parser_cached("cached parser 3", "log 2", runner=runner)
+    run_parser_cached("cached parser 2", "log 3", runner=runner)
+
+    assert calls == [("cached parser 2", "log 2"), ("cached parser 3", "log 2"), ("cached parser 2", "log 3")]
+
+
+def test_run_parser_cached_does_not_cache_timeouts():
+    calls = []
+
+    def runner(script, log):
+        calls.append(script)
+        raise TimeoutError
+
+    for _ in range(2):
+        with pytest.raises(TimeoutError):
+            run_parser_cached("cached parser 4", "log 4", runner=runner)
+
+    assert calls == ["cached parser 4", "cached parser 4"]
+
+
+def test_run_parser_cached_evicts_least_recently_used(monkeypatch):
+    monkeypatch.setattr(parser_module, "PARSER_RESULT_CACHE_SIZE", 2)
+    monkeypatch.setattr(parser_module, "_parser_result_cache", OrderedDict())
+    calls = []
+
+    def runner(script, log):
+        calls.append(script)
+        return {script: "pass"}
+
+    for script in ["p1", "p2", "p1", "p3", "p1", "p2"]:
+        run_parser_cached(script, "log", runner=runner)
+
+    assert calls == ["p1", "p2", "p3", "p2"]
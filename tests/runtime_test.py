@@ -39,8 +39,11 @@ index 0000000..7a754f4
 -> session.cleanup()
 '''
 
+import io
 import os
 import platform as host_platform
+import socket
+import tarfile
 import warnings
 
 import docker
@@ -48,6 +51,7 @@ import pytest
 from docker.errors import APIError, DockerException, ImageNotFound
 
 from launch.core.runtime import SetupRuntime
+from launch.core.platforms.base import TIMEOUT_EXIT_CODE
 from launch.core.platforms.linux import LinuxRuntime
 from launch.core.platforms.windows import WindowsRuntime
 from launch.core.platforms.android import AndroidRuntime
@@ -169,6 +173,191 @@ def test_runtime_constructor_attributes(runtime_cls, expected_attrs, patch_runti
         runtime.stopped = True
 
 
+class PipeSocket:
+    """Has a fileno() like docker's NpipeSocket on Windows hosts, but is not a socket."""
+
+    def __init__(self, sock: socket.socket):
+        self.sock = sock
+
+    def fileno(self):
+        return self.sock.fileno()
+
+    def recv(self, size):
+        return self.sock.recv(size)
+
+
+class FailingSelector:
+    def select(self, timeout=None):
+        raise OSError("select() is only supported on sockets")
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def socket_pair():
+    container_end, host_end = socket.socketpair()
+    yield container_end, host_end
+    container_end.close()
+    host_end.close()
+
+
+@pytest.fixture
+def patch_runtime_shell_setup(monkeypatch):
+    monkeypatch.setattr(LinuxRuntime, "_clear_initial_prompt", lambda self: None)
+    monkeypatch.setattr(LinuxRuntime, "send_command", no_command_result)
+
+
+def read_pending_output(runtime, timeout=5):
+    assert runtime._poll_output(timeout)
+    output = b"".join(runtime._chunks)
+    runtime._chunks.clear()
+    return output
+
+
+@pytest.mark.skipif(os.name == "nt", reason="the selector is only used on POSIX hosts")
+def test_runtime_selects_on_real_socket(socket_pair, patch_runtime_shell_setup):
+    container_end, host_end = socket_pair
+    runtime = LinuxRuntime(FakeContainer(container_end))
+
+    assert runtime._selector is not None
+    host_end.sendall(b"output")
+    assert read_pending_output(runtime) == b"output"
+
+
+def test_runtime_reads_non_socket_from_thread(socket_pair, patch_runtime_shell_setup):
+    container_end, host_end = socket_pair
+    runtime = LinuxRuntime(FakeContainer(PipeSocket(container_end)))
+
+    assert runtime._selector is None
+    host_end.sendall(b"output")
+    assert read_pending_output(runtime) == b"output"
+
+
+@pytest.mark.skipif(os.name == "nt", reason="the selector is only used on POSIX hosts")
+def test_runtime_falls_back_to_thread_when_select_fails(socket_pair, patch_runtime_shell_setup):
+    container_end, host_end = socket_pair
+    runtime = LinuxRuntime(FakeContainer(container_end))
+    runtime._selector = FailingSelector()
+
+    host_end.sendall(b"output")
+    assert read_pending_output(runtime) == b"output"
+    assert runtime._selector is None
+
+
+
+class ExecContainer(FakeContainer):
+    def __init__(self, exit_code: int, output: bytes):
+        super().__init__(FakeSocket())
+        self.exit_code = exit_code
+        self.output = output
+        self.commands = []
+
+    def exec_run(self, cmd, workdir=None):
+        self.commands.append(cmd)
+        return self.exit_code, self.output
+
+
+def test_exec_command_runs_under_command_timeout(patch_runtime_constructor_io):
+    container = ExecContainer(0, b"done")
+    runtime = LinuxRuntime(container, command_timeout=2)
+
+    result = runtime.exec_command("apt update")
+
+    assert container.commands == [["timeout", "-k", "5", "120", "/bin/bash", "-c", "apt update"]]
+    assert result.metadata.exit_code == 0
+    assert result.output == "done"
+
+
+def test_exec_command_reports_timeout_like_send_command(patch_runtime_constructor_io):
+    runtime = LinuxRuntime(ExecContainer(124, b"partial"), command_timeout=2)
+
+    result = runtime.exec_command("git fetch origin")
+
+    assert result.metadata.exit_code == TIMEOUT_EXIT_CODE
+    assert result.output == "partial\n**Exited due to timeout**\n"
+
+
+class ArchiveContainer(FakeContainer):
+    def __init__(self, fail: bool = False):
+        super().__init__(FakeSocket())
+        self.fail = fail
+        self.chunks = []
+
+    def put_archive(self, path, data):
+        self.path = path
+        for chunk in data:
+            self.chunks.append(chunk)
+            if self.fail:
+                raise APIError("upload rejected")
+        return True
+
+    def archive_files(self):
+        with tarfile.open(fileobj=io.BytesIO(b"".join(self.chunks))) as tar:
+            return {
+                member.name: tar.extractfile(member).read()
+                for member in tar.getmembers()
+                if member.isfile()
+            }
+
+
+@pytest.fixture
+def copy_source(tmp_path):
+    src = tmp_path / "src"
+    (src / "pkg").mkdir(parents=True)
+    (src / "pkg" / "big.bin").write_bytes(os.urandom(300 * 1024))
+    (src / "setup.py").write_text("print('setup')")
+    return src
+
+
+def test_copy_to_container_streams_directory_contents(copy_source, patch_runtime_constructor_io):
+    container = ArchiveContainer()
+    runtime = LinuxRuntime(container)
+
+    runtime.copy_to_container(str(copy_source), "/testbed")
+
+    assert container.path == "/testbed"
+    assert len(container.chunks) > 1
+    assert container.archive_files() == {
+        "./pkg/big.bin": (copy_source / "pkg" / "big.bin").read_bytes(),
+        "./setup.py": b"print('setup')",
+    }
+
+
+def test_copy_to_container_single_file(copy_source, patch_runtime_constructor_io):
+    container = ArchiveContainer()
+    runtime = LinuxRuntime(container)
+
+    runtime.copy_to_container(str(copy_source / "setup.py"), "/testbed")
+
+    assert container.archive_files() == {"setup.py": b"print('setup')"}
+
+
+def test_copy_dir_to_container_adds_top_level_entries(copy_source, patch_runtime_constructor_io):
+    container = ArchiveContainer()
+    runtime = LinuxRuntime(container)
+
+    runtime.copy_dir_to_container(str(copy_source), "/testbed")
+
+    assert container.archive_files() == {
+        "pkg/big.bin": (copy_source / "pkg" / "big.bin").read_bytes(),
+        "setup.py": b"print('setup')",
+    }
+
+
+def test_copy_to_container_raises_archive_errors(tmp_path, patch_runtime_constructor_io):
+    runtime = LinuxRuntime(ArchiveContainer())
+
+    with pytest.raises(FileNotFoundError):
+        runtime.copy_to_container(str(tmp_path / "missing.txt"), "/testbed")
+
+
+def test_copy_to_container_raises_upload_errors(copy_source, patch_runtime_constructor_io):
+    runtime = LinuxRuntime(ArchiveContainer(fail=True))
+
+    with pytest.raises(APIError):
+        runtime.copy_to_container(str(copy_source), "/testbed")
+
 
 def supported_integration_platforms() -> set[str]:
     system = host_platform.system().lower()